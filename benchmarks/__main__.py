@@ -0,0 +1,133 @@
+"""Runs the benchmark suite and compares results across commits. From the repo root:
+::
+    python -m benchmarks                                  # all benchmarks → benchmarks/results/<commit>.json
+    python -m benchmarks run bench_formatting bench_loggr -o before.json
+    python -m benchmarks compare before.json after.json   # exits with 1 if anything regressed by more than --threshold %
+
+Every `benchmarks/bench_*.py` module exposes `run() -> list` of {'name', 'value', 'unit', ...} results.
+Units ending with '/s' (throughput) are better when higher, the rest (time, memory) when lower."""
+import argparse
+import datetime
+import importlib
+import json
+import pkgutil
+import platform
+import subprocess
+import sys
+import traceback
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import benchmarks
+from benchmarks._util import report
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_THRESHOLD = 10.0
+
+
+def discover() -> List[str]:
+    return sorted(module.name for module in pkgutil.iter_modules(benchmarks.__path__) if module.name.startswith('bench_'))
+
+
+def _git(*args) -> Optional[str]:
+    try:
+        return subprocess.run(['git', *args], cwd=REPO_ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(names: List[str]) -> dict:
+    """Runs the `names` benchmark modules and returns {'meta': {...}, 'results': {module: [result, ...]}}.
+    A module that fails gets {'error': traceback} instead of its results."""
+    meta = {'commit':   _git('rev-parse', '--short', 'HEAD'),
+            'dirty':    bool(_git('status', '--porcelain', '--untracked-files=no')),
+            'python':   platform.python_version(),
+            'platform': platform.platform(),
+            'time':     datetime.datetime.now().isoformat(timespec='seconds')}
+    results: Dict[str, object] = dict()
+    for name in names:
+        print(f'\n# {name}', flush=True)
+        try:
+            module_results = importlib.import_module(f'benchmarks.{name}').run()
+        except Exception:
+            results[name] = {'error': traceback.format_exc()}
+            print(results[name]['error'], file=sys.stderr)
+            continue
+        report(module_results)
+        results[name] = module_results
+    return {'meta': meta, 'results': results}
+
+
+def _higher_is_better(unit: str) -> bool:
+    return unit.split(' ')[0].endswith('/s')
+
+
+def compare(base: dict, head: dict, *, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Prints how every result common to `base` and `head` changed, and returns the names of those that regressed
+    by more than `threshold` percent."""
+    rows = [('benchmark', 'base', 'head', 'change', '')]
+    regressions = []
+    for module, head_results in head['results'].items():
+        base_results = base['results'].get(module)
+        if isinstance(head_results, dict) or not isinstance(base_results, list):
+            continue  # failed or missing
+        base_by_name = {result['name']: result for result in base_results}
+        for result in head_results:
+            base_result = base_by_name.get(result['name'])
+            if base_result is None or not base_result['value']:
+                continue
+            change = (result['value'] - base_result['value']) / base_result['value'] * 100
+            worse = -change if _higher_is_better(result['unit']) else change
+            verdict = ''
+            if worse > threshold:
+                verdict = 'REGRESSION'
+                regressions.append(f"{module}: {result['name']}")
+            elif worse < -threshold:
+                verdict = 'improvement'
+            rows.append((f"{module}: {result['name']}", f"{base_result['value']:.3f}", f"{result['value']:.3f}",
+                         f'{change:+.1f}%', verdict))
+    widths = [max(len(row[i]) for row in rows) for i in range(4)]
+    for row in rows:
+        print(f'{row[0]:<{widths[0]}}  {row[1]:>{widths[1]}}  {row[2]:>{widths[2]}}  {row[3]:>{widths[3]}}  {row[4]}')
+    base_meta, head_meta = base['meta'], head['meta']
+    print(f"\nbase: {base_meta.get('commit')} ({base_meta.get('time')}), head: {head_meta.get('commit')} ({head_meta.get('time')}); "
+          f"{len(regressions)} regressions over {threshold}%")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command')
+    run_parser = commands.add_parser('run', help='run benchmarks and write their results as JSON (the default command)')
+    run_parser.add_argument('names', nargs='*', help=f'benchmark modules (default: all of {", ".join(discover())})')
+    run_parser.add_argument('-o', '--output', type=Path, help='default: benchmarks/results/<commit>.json')
+    compare_parser = commands.add_parser('compare', help='compare two results files')
+    compare_parser.add_argument('base', type=Path)
+    compare_parser.add_argument('head', type=Path)
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='percent (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        base = json.loads(args.base.read_text())
+        head = json.loads(args.head.read_text())
+        return 1 if compare(base, head, threshold=args.threshold) else 0
+
+    names = getattr(args, 'names', None) or discover()
+    unknown = set(names) - set(discover())
+    if unknown:
+        parser.error(f'unknown benchmarks: {", ".join(sorted(unknown))}')
+    suite = run_suite(names)
+    output = getattr(args, 'output', None)
+    if output is None:
+        commit = suite['meta']['commit'] or 'unknown'
+        output = RESULTS_DIR / f"{commit}{'-dirty' if suite['meta']['dirty'] else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(suite, indent=2, ensure_ascii=False, default=str))
+    print(f'\nwrote {output}')
+    return 1 if any(isinstance(results, dict) for results in suite['results'].values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""Tiny helpers shared by the benchmark scripts.
+Run a benchmark module from the repo root, e.g. ``python -m benchmarks.bench_exc_handler``."""
+import timeit
+from typing import Callable, List
+
+
+def measure(name: str, fn: Callable, *, number: int = 10_000, repeat: int = 5, gc: bool = False) -> dict:
+    """Times `fn` and returns the best per-call time (min of `repeat` runs), in microseconds.
+    The garbage collector is disabled while timing (timeit's default), unless `gc` is True;
+    enable it for code that creates reference cycles (e.g. exceptions with their tracebacks), or memory piles up."""
+    timings = timeit.repeat(fn, setup='gc.enable()' if gc else 'pass', number=number, repeat=repeat)
+    return {'name': name, 'value': min(timings) / number * 1_000_000, 'unit': 'µs/call', 'number': number, 'repeat': repeat}
+
+
+def report(results: List[dict]):
+    width = max(len(r['name']) for r in results)
+    for r in results:
+        print(f"{r['name']:<{width}}  {r['value']:>12.3f} {r['unit']}")
@@ -0,0 +1,100 @@
+"""`CrashArchive.append()` (instead of rendering `ExcHandler.full()` on the spot), concurrent appends from several
+processes (which must leave a consistent archive), and querying an archive's index as it grows: listing everything,
+and filtering by exception type."""
+import multiprocessing
+import tempfile
+
+from igit_debug import ExcHandler
+from igit_debug.archive import CrashArchive, INDEX_ENTRY, INDEX_MAGIC
+
+from benchmarks._util import measure, report
+
+SIZES = (10_000, 1_000_000)
+PROCESSES = 4
+APPENDS_PER_PROCESS = 200
+
+
+def _raise(depth: int, kind: int):
+    lokals = {f'var_{i}': list(range(10)) for i in range(5)}
+    if depth == 0:
+        raise (KeyError if kind else ValueError)('bad value', kind)
+    _raise(depth - 1, kind)
+
+
+def _append(archive: CrashArchive, kind: int = 0):
+    try:
+        _raise(10, kind)
+    except Exception as e:
+        return archive.append(e)
+
+
+def _append_many(path: str) -> list:
+    """Runs in a worker process. Every append gets a distinct exception type, so the strings file grows concurrently too."""
+    archive = CrashArchive(path)
+    process = multiprocessing.current_process().name
+    indices = []
+    for i in range(APPENDS_PER_PROCESS):
+        try:
+            raise type(f'Error_{process}_{i}', (Exception,), {})(i)
+        except Exception as e:
+            indices.append(archive.append(e))
+    return indices
+
+
+def _append_concurrently() -> dict:
+    total = PROCESSES * APPENDS_PER_PROCESS
+    with tempfile.TemporaryDirectory() as path:
+        result = measure(f'archive.append(e) from {PROCESSES} processes, {total} appends',
+                         lambda: _check_concurrent_appends(path, total), number=1, repeat=1)
+    return result
+
+
+def _check_concurrent_appends(path: str, total: int):
+    with multiprocessing.Pool(PROCESSES) as pool:
+        indices = [index for indices in pool.map(_append_many, [path] * PROCESSES) for index in indices]
+    archive = CrashArchive(path)
+    assert sorted(indices) == list(range(total)), f'{len(set(indices))} of {total} returned indices are unique'
+    assert len(archive) == total, f'the index has {len(archive)} entries, {total} were appended'
+    assert (archive.path / 'index').read_bytes().count(INDEX_MAGIC) == 1, 'the index has more than one header'
+    entries = list(archive.entries())
+    assert len({entry.exc_type for entry in entries}) == total
+    assert all(archive.record(entry)['type'] == entry.exc_type for entry in entries[::37])
+
+
+def _full():
+    try:
+        _raise(10, 0)
+    except Exception as e:
+        return ExcHandler(e).full()
+
+
+def _grow(archive: CrashArchive, size: int):
+    """Appends copies of the existing index entries (pointing at the same records) until there are `size` of them."""
+    with open(archive.path / 'index', 'rb') as index_file:
+        index = index_file.read()
+    entries = index[-(len(index) // INDEX_ENTRY.size) * INDEX_ENTRY.size:]
+    with open(archive.path / 'index', 'ab') as index_file:
+        while len(archive) < size:
+            index_file.write(entries[:(size - len(archive)) * INDEX_ENTRY.size])
+
+
+def run() -> list:
+    results = []
+    with tempfile.TemporaryDirectory() as path:
+        archive = CrashArchive(path)
+        results.append(measure('ExcHandler(e).full(), depth=10', _full, number=200, repeat=3, gc=True))
+        results.append(measure('archive.append(e), depth=10', lambda: _append(archive), number=200, repeat=3, gc=True))
+        results.append(_append_concurrently())
+        for kind in range(100):  # 1% KeyErrors
+            _append(archive, kind=int(kind == 0))
+        for size in SIZES:
+            _grow(archive, size)
+            results.append(measure(f'list(archive.entries()), {size} entries',
+                                   lambda: sum(1 for _ in archive.entries()), number=1, repeat=3))
+            results.append(measure(f"list(archive.entries(exc_type='KeyError')), {size} entries",
+                                   lambda: sum(1 for _ in archive.entries(exc_type='KeyError')), number=1, repeat=3))
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
@@ -0,0 +1,81 @@
+"""Many worker processes logging at high rates through `Loggr`, each writing to the shared stream on its own
+vs forwarding batches to a `LogCollector` in the parent. Checks that no record is lost or torn with the collector."""
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import logbook
+
+from igit_debug.collector import LogCollector
+from igit_debug.loggr import FORMAT_STRING, set_output_handler, use_forwarded_output
+
+WORKERS = 4
+RECORDS_PER_WORKER = 10_000
+LINE_RE = re.compile(r'^\S+ \| \S+\.work\(\) \| worker (\d+) record (\d+)$')
+ANSI_RE = re.compile(r'\x1b\[[\d;]*m')
+
+
+def work(worker: int) -> int:
+    from igit_debug.loggr import Loggr
+    
+    logger = Loggr('bench')
+    for i in range(RECORDS_PER_WORKER):
+        logger.info(f'worker {worker} record {i}')
+    return RECORDS_PER_WORKER
+
+
+def _use_shared_file(path: str):
+    set_output_handler(logbook.StreamHandler(open(path, 'a', buffering=1), format_string=FORMAT_STRING))
+
+
+def _check(path: str) -> int:
+    """Returns the number of torn lines; asserts nothing was lost and every worker's records are in order."""
+    last = dict()
+    torn = 0
+    with open(path) as f:
+        for line in f:
+            match = LINE_RE.match(ANSI_RE.sub('', line.rstrip('\n')))
+            if not match:
+                torn += 1
+                continue
+            worker, i = map(int, match.groups())
+            assert i == last.get(worker, -1) + 1, f'worker {worker}: record {i} after {last.get(worker)}'
+            last[worker] = i
+    if not torn:
+        assert all(last[w] == RECORDS_PER_WORKER - 1 for w in range(WORKERS)), last
+    return torn
+
+
+def _run_pool(initializer, initargs) -> float:
+    start = time.perf_counter()
+    with ProcessPoolExecutor(WORKERS, initializer=initializer, initargs=initargs) as pool:
+        assert sum(pool.map(work, range(WORKERS))) == WORKERS * RECORDS_PER_WORKER
+    return time.perf_counter() - start
+
+
+def run() -> list:
+    total = WORKERS * RECORDS_PER_WORKER
+    unit = f'records/s ({WORKERS} processes)'
+    results = []
+    with tempfile.NamedTemporaryFile('w', suffix='.log') as shared:
+        elapsed = _run_pool(_use_shared_file, (shared.name,))
+        torn = _check(shared.name)
+        results.append({'name': f'shared file, each worker writes ({torn} torn lines)', 'value': total / elapsed, 'unit': unit})
+    
+    with tempfile.NamedTemporaryFile('w', suffix='.log') as collected:
+        start = time.perf_counter()
+        with open(collected.name, 'w') as stream, LogCollector(stream) as collector:
+            _run_pool(use_forwarded_output, collector.initargs)
+        elapsed = time.perf_counter() - start
+        assert collector.received == total, f'received {collector.received} of {total}'
+        torn = _check(collected.name)
+        assert not torn, f'{torn} torn lines with LogCollector'
+        results.append({'name': 'LogCollector', 'value': total / elapsed, 'unit': unit})
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks._util import report
+    
+    report(run())
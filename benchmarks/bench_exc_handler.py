@@ -0,0 +1,117 @@
+"""ExcHandler construction cost, `short()` / `summary()` / `full()` at varying stack depths and locals sizes,
+filtering library frames out of a deep (recursive parser like) stack, `full()` of an exception re-raised
+by every layer of a deep call chain (`raise ... from e`), whose linked exceptions share most of their frames,
+and rendering an already extracted deep report with each renderer (to a string, and streamed to a file).
+
+'eager' forces frame extraction right after construction (i.e. how ExcHandler behaved before extraction became lazy),
+'lazy' only pays for what `shorter()` needs."""
+import contextlib
+import io
+import os
+import traceback
+
+from igit_debug import ExcHandler
+from igit_debug.renderers import RENDERERS
+
+from benchmarks._util import measure, report
+
+DEPTHS = (1, 10, 50)
+# number of locals in every frame of the stack, and their size
+LOCALS = {'few small locals': (3, 1), 'many big locals': (20, 100)}
+
+
+def _raise_at_depth(depth: int):
+    if depth == 0:
+        payload = list(range(100))
+        raise ValueError('bad value', payload[0])
+    _raise_at_depth(depth - 1)
+
+
+def _raise_with_locals(depth: int, nlocals: int, size: int):
+    lokals = {f'var_{i}': list(range(size)) for i in range(nlocals)}  # formatted like any other local
+    if depth == 0:
+        raise ValueError('bad value', nlocals)
+    _raise_with_locals(depth - 1, nlocals, size)
+
+
+def _reraise_chain(depth: int):
+    layer = list(range(10))
+    try:
+        if depth == 0:
+            raise ValueError('bad value')
+        _reraise_chain(depth - 1)
+    except ValueError as e:
+        raise ValueError(f'layer {depth} failed') from e
+
+
+def _chain_full(depth: int) -> str:
+    try:
+        _reraise_chain(depth)
+    except ValueError as e:
+        return ExcHandler(e).full()
+
+
+def _extracted(depth: int, nlocals: int, size: int) -> ExcHandler:
+    try:
+        _raise_with_locals(depth, nlocals, size)
+    except ValueError as e:
+        handler = ExcHandler(e)
+        handler.frame_summaries
+        return handler
+
+
+def _construct_shorter(depth: int, *, eager: bool):
+    try:
+        _raise_at_depth(depth)
+    except ValueError as e:
+        handler = ExcHandler(e)
+        if eager:
+            handler.frame_summaries
+        return handler.shorter()
+
+
+def _construct_and_render(depth: int, nlocals: int, size: int, render: str):
+    try:
+        _raise_with_locals(depth, nlocals, size)
+    except ValueError as e:
+        return getattr(ExcHandler(e), render)()
+
+
+def _deep_stack(depth: int) -> traceback.StackSummary:
+    if depth == 0:
+        return traceback.extract_stack()
+    return _deep_stack(depth - 1)
+
+
+def run() -> list:
+    results = []
+    deep_stack = _deep_stack(500)
+    results.append(measure(f'_remove_nonlib_frames({len(deep_stack)} frames)',
+                           lambda: ExcHandler._remove_nonlib_frames(deep_stack), number=1_000))
+    for depth in DEPTHS:
+        results.append(measure(f'ExcHandler(e).shorter() eager, depth={depth}',
+                               lambda: _construct_shorter(depth, eager=True), number=2_000))
+        results.append(measure(f'ExcHandler(e).shorter() lazy, depth={depth}',
+                               lambda: _construct_shorter(depth, eager=False), number=2_000))
+    with contextlib.redirect_stdout(io.StringIO()):  # full() prints skipped functions
+        for locals_name, (nlocals, size) in LOCALS.items():
+            for depth in DEPTHS:
+                for render, number in (('short', 200), ('summary', 200), ('full', 5)):
+                    results.append(measure(f'ExcHandler(e).{render}(), depth={depth}, {locals_name}',
+                                           lambda: _construct_and_render(depth, nlocals, size, render),
+                                           number=number, repeat=3, gc=True))
+        for depth in (10, 50):
+            results.append(measure(f'ExcHandler(e).full(), re-raise chain of {depth + 1} exceptions',
+                                   lambda: _chain_full(depth), number=5, repeat=3, gc=True))
+        handler = _extracted(200, 20, 1)
+        for renderer in RENDERERS:
+            results.append(measure(f"handler.render(renderer='{renderer}'), depth=200",
+                                   lambda: handler.render(renderer=renderer), number=5, repeat=3, gc=True))
+        with open(os.devnull, 'w') as devnull:
+            results.append(measure("handler.render(renderer='plain', file=devnull), depth=200",
+                                   lambda: handler.render(renderer='plain', file=devnull), number=5, repeat=3, gc=True))
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
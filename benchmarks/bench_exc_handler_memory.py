@@ -0,0 +1,73 @@
+"""Memory retained by ExcHandlers that outlive their `except` block.
+
+Handles 100k exceptions, each raised from a frame holding a 64KB payload, and keeps the latest 256 handlers around
+(like a log queue would). With snapshot=True, the kept handlers must not retain their payloads: retained memory must be
+far below KEPT payloads, and far below what snapshot=False retains. `run()` asserts both."""
+import collections
+import gc
+import tracemalloc
+
+from igit_debug import ExcHandler
+
+TOTAL = 100_000
+WARMUP = 10_000
+KEPT = 256
+PAYLOAD_KB = 64
+
+
+class Payload:
+    """Large in memory, cheap to repr (like a DataFrame or a request body)."""
+    
+    def __init__(self):
+        self.data = bytes(PAYLOAD_KB * 1024)
+    
+    def __repr__(self):
+        return f'Payload({len(self.data)} bytes)'
+
+
+def _fail(i):
+    payload = Payload()
+    raise ValueError('bad request', i)
+
+
+def _handle_one(i, *, snapshot: bool) -> ExcHandler:
+    try:
+        _fail(i)
+    except ValueError as e:
+        return ExcHandler(e, snapshot=snapshot)
+
+
+def _handle_many(*, snapshot: bool) -> dict:
+    kept = collections.deque(maxlen=KEPT)
+    tracemalloc.start()
+    try:
+        for i in range(TOTAL):
+            kept.append(_handle_one(i, snapshot=snapshot))
+            if i == WARMUP:
+                gc.collect()  # exception <-> traceback <-> frame cycles are garbage, not retained memory
+                after_warmup, _ = tracemalloc.get_traced_memory()
+        gc.collect()
+        end, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    growth_kb = (end - after_warmup) / 1024
+    return {'name': f'ExcHandler(snapshot={snapshot}) retained after {TOTAL} exceptions',
+            'value': end / 1024, 'unit': f'KB (growth since #{WARMUP}: {growth_kb:.1f}KB, peak: {peak / 1024:.1f}KB)',
+            'retained_kb': end / 1024, 'growth_kb': growth_kb}
+
+
+def run() -> list:
+    unsnapshotted, snapshotted = _handle_many(snapshot=False), _handle_many(snapshot=True)
+    payloads_kb = KEPT * PAYLOAD_KB
+    retained_kb = snapshotted['retained_kb']
+    assert retained_kb < payloads_kb / 10, \
+        f'snapshot=True retained {retained_kb:.1f}KB, {KEPT} payloads are {payloads_kb}KB'
+    assert retained_kb < unsnapshotted['retained_kb'] / 10, \
+        f"snapshot=True retained {retained_kb:.1f}KB, snapshot=False {unsnapshotted['retained_kb']:.1f}KB"
+    return [unsnapshotted, snapshotted]
+
+
+if __name__ == '__main__':
+    from benchmarks._util import report
+    
+    report(run())
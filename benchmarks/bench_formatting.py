@@ -0,0 +1,45 @@
+"""`formatting.pformat` over a realistic mix of values, with and without types,
+and bounded formatting of pathological values (cost should be proportional to the output)."""
+import collections
+
+from igit_debug.formatting import pformat, bounded_repr
+
+from benchmarks._util import measure, report
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+MIX = [0, 42, -1, 3.14, None, True, False, 'id', 'user_name', 'hello world', 'key:', 2 ** 40,
+       [1, 2, 3], ('a', 1), {'a': 1, 'b': [1, 2]}, {1, 2}, Point(1, 2), int, Point]
+PRIMITIVES = [0, 42, 3.14, None, True, 2 ** 40]
+HUGE_LIST = list(range(10_000_000))
+HUGE_DEQUE = collections.deque(range(3_000_000))
+NESTED = {'level': 0}
+for _level in range(1, 500):
+    NESTED = {'level': _level, 'child': NESTED, 'siblings': list(range(100))}
+
+
+def _format_all(values, types):
+    for value in values:
+        pformat(value, types=types)
+
+
+def run() -> list:
+    results = []
+    for types in (False, True):
+        results.append(measure(f'pformat(primitives, types={types}) x{len(PRIMITIVES)}', lambda: _format_all(PRIMITIVES, types)))
+        results.append(measure(f'pformat(mix, types={types}) x{len(MIX)}', lambda: _format_all(MIX, types), number=2_000))
+    results.append(measure('bounded_repr(10M-item list)', lambda: bounded_repr(HUGE_LIST), number=1_000))
+    results.append(measure('bounded_repr(500-level nested dict)', lambda: bounded_repr(NESTED), number=1_000))
+    results.append(measure('pformat(10M-item list, max_chars=300)', lambda: pformat(HUGE_LIST, max_chars=300), number=1_000))
+    results.append(measure('bounded_repr(3M-item deque)', lambda: bounded_repr(HUGE_DEQUE), number=1_000))
+    results.append(measure('pformat(3M-item deque, max_chars=300)', lambda: pformat(HUGE_DEQUE, max_chars=300), number=1_000))
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
@@ -0,0 +1,78 @@
+"""Throughput of many threads logging at once through `Loggr`, with the default synchronous StreamHandler
+vs `QueuedStreamHandler`, writing to a temp file, and to a slow stream (like a congested pipe or container log driver).
+Also single-threaded throughput of colored vs structured (ANSI-free) output."""
+import tempfile
+import threading
+import time
+
+import logbook
+
+from igit_debug.handlers import QueuedStreamHandler, StructuredFormatter
+from igit_debug.loggr import Loggr, FORMAT_STRING
+
+THREADS = 8
+RECORDS_PER_THREAD = 2_000
+
+
+class SlowStream:
+    """Every write() takes 100µs, regardless of its size."""
+    
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def write(self, data):
+        time.sleep(0.0001)
+        self.stream.write(data)
+    
+    def flush(self):
+        self.stream.flush()
+
+
+def _throughput(name: str, make_handler, *, slow=False, threads=THREADS) -> dict:
+    logger = Loggr('bench')
+    
+    def work():
+        for i in range(RECORDS_PER_THREAD):
+            logger.info('request handled', i)
+    
+    with tempfile.TemporaryFile('w') as stream:
+        handler = make_handler(SlowStream(stream) if slow else stream)
+        with handler.applicationbound():
+            workers = [threading.Thread(target=work) for _ in range(threads)]
+            start = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            handler.close()  # includes writing everything that's still queued
+            elapsed = time.perf_counter() - start
+    return {'name': name, 'value': threads * RECORDS_PER_THREAD / elapsed, 'unit': f'records/s ({threads} threads)'}
+
+
+def _structured_handler(fmt):
+    def make_handler(stream):
+        handler = logbook.StreamHandler(stream)
+        handler.formatter = StructuredFormatter(fmt)
+        return handler
+    
+    return make_handler
+
+
+def run() -> list:
+    results = []
+    for slow in (False, True):
+        stream_name = 'slow stream' if slow else 'file'
+        results.append(_throughput(f'logbook.StreamHandler, {stream_name}',
+                                   lambda stream: logbook.StreamHandler(stream, format_string=FORMAT_STRING), slow=slow))
+        results.append(_throughput(f'QueuedStreamHandler, {stream_name}',
+                                   lambda stream: QueuedStreamHandler(stream, format_string=FORMAT_STRING), slow=slow))
+    results.append(_throughput('colored', lambda stream: logbook.StreamHandler(stream, format_string=FORMAT_STRING), threads=1))
+    results.append(_throughput('structured, json', _structured_handler('json'), threads=1))
+    results.append(_throughput('structured, kv', _structured_handler('kv'), threads=1))
+    return results
+
+
+if __name__ == '__main__':
+    from benchmarks._util import report
+    
+    report(run())
@@ -0,0 +1,47 @@
+"""Import time of `igit_debug.loggr`, measured in fresh subprocesses with `-X importtime`.
+Importing the module must stay cheap; the first attribute access (`from igit_debug.loggr import Loggr`) pays for logbook etc."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+REPEAT = 5
+# `python -m benchmarks.bench_import` fails if `import igit_debug.loggr` takes longer than this
+MAX_IMPORT_US = 10_000
+
+
+def _cumulative_import_us(statement: str, module: str) -> int:
+    """Best (min of REPEAT) cumulative import time of `module` while running `statement`, in microseconds."""
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    timings = []
+    for _ in range(REPEAT):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                              env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+        for line in proc.stderr.splitlines():
+            # "import time:       225 |        225 |     _typing"
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module:
+                cumulative_us = fields[1]
+                timings.append(int(cumulative_us))
+                break
+        else:
+            raise RuntimeError(f'{module} not found in -X importtime output of {statement!r}')
+    return min(timings)
+
+
+def run() -> list:
+    return [
+        {'name': 'import igit_debug.loggr', 'unit': 'µs',
+         'value': _cumulative_import_us('import igit_debug.loggr', 'igit_debug.loggr')},
+        {'name': 'from igit_debug.loggr import Loggr (incl. igit_debug._loggr)', 'unit': 'µs',
+         'value': _cumulative_import_us('from igit_debug.loggr import Loggr', 'igit_debug._loggr')},
+        ]
+
+
+if __name__ == '__main__':
+    from benchmarks._util import report
+    
+    results = run()
+    report(results)
+    assert results[0]['value'] <= MAX_IMPORT_US, f"import igit_debug.loggr took {results[0]['value']}µs > {MAX_IMPORT_US}µs"
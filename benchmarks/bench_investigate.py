@@ -0,0 +1,54 @@
+"""Overhead of an `investigate`-decorated call compared to a bare call, for a few option sets.
+The wrapper is specialized at decoration time, and with all output disabled the function itself is returned.
+Also the per-item overhead of a traced generator, with items not logged and sampled."""
+import contextlib
+import io
+
+from igit_debug.investigate import investigate
+from igit_debug.sampling import EveryNth
+
+from benchmarks._util import measure, report
+
+
+def fn(a, b=2, *, c=3):
+    return a
+
+
+def gen(n):
+    yield from range(n)
+
+
+ITEMS = 10_000
+
+
+OPTIONS = {
+    'defaults':                    dict(),
+    'args=False':                  dict(args=False),
+    'args=False, ret_val=False':   dict(args=False, ret_val=False),
+    'ret_val=False, types=True':   dict(ret_val=False, types=True),
+    'all output disabled':         dict(args=False, ret_val=False, print_exc=False),
+    'latency only':                dict(args=False, ret_val=False, print_exc=False, latency=True),
+    }
+
+
+def run() -> list:
+    results = [measure('bare call', lambda: fn(1, c=3), number=100_000)]
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        for name, options in OPTIONS.items():
+            decorated = investigate(**options)(fn)
+            results.append(measure(f'@investigate({name}) call',
+                                   lambda: (decorated(1, c=3), sink.seek(0), sink.truncate())))
+        
+        results.append(measure('bare generator, per item', lambda: sum(gen(ITEMS)), number=10))
+        for name, options in {'yields=False': dict(), 'yields=EveryNth(1000)': dict(yields=EveryNth(1000))}.items():
+            decorated_gen = investigate(**options)(gen)
+            results.append(measure(f'@investigate({name}) generator, per item',
+                                   lambda: (sum(decorated_gen(ITEMS)), sink.seek(0), sink.truncate()), number=10))
+        for result in results[-3:]:
+            result['value'] /= ITEMS
+            result['unit'] = 'µs/item'
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
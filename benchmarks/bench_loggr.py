@@ -0,0 +1,78 @@
+"""`Loggr` call cost at enabled and disabled levels, and at a disabled level with the flight recorder on
+(plus the cost of dumping a full buffer, and the memory a full buffer retains, which `run()` asserts is bounded
+whatever was logged). Output goes to a logbook.NullHandler."""
+import gc
+import tracemalloc
+
+import logbook
+
+from igit_debug.flight_recorder import DEFAULT_CAPACITY, MAX_ARG_CHARS
+from igit_debug.loggr import Loggr, use_flight_recorder
+
+from benchmarks._util import measure, report
+
+BIG = {'rows': [{'id': i, 'name': f'row {i}'} for i in range(200)]}
+PAYLOAD_KB = 64
+# per record: the record tuple and a captured arg of MAX_ARG_CHARS chars, with room to spare
+RECORD_BOUND = 4 * MAX_ARG_CHARS + 1024
+
+
+class Payload:
+    """Large in memory, with an unbounded repr."""
+
+    def __init__(self):
+        self.data = 'x' * (PAYLOAD_KB * 1024)
+
+    def __repr__(self):
+        return f'Payload({self.data})'
+
+
+def _retained_by_full_buffer(logger: Loggr, recorder) -> dict:
+    recorder.drain()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(DEFAULT_CAPACITY * 2):
+            logger.debug('payload:', Payload(), Payload().data)
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    retained = after - before
+    bound = DEFAULT_CAPACITY * RECORD_BOUND
+    assert retained < bound, f'{DEFAULT_CAPACITY} records retained {retained / 1024:.1f}KB, more than {bound / 1024:.1f}KB'
+    recorder.drain()
+    return {'name': f'recorder memory, {DEFAULT_CAPACITY} records of 2 {PAYLOAD_KB}KB args',
+            'value': retained / 1024, 'unit': f'KB (bound: {bound / 1024:.1f}KB)'}
+
+
+def run() -> list:
+    logger = Loggr('bench', level='INFO')
+    results = []
+    with logbook.NullHandler().applicationbound():
+        results.append(measure('bare function call', lambda: None, number=100_000))
+        results.append(measure('disabled: logger.debug(big_obj)', lambda: logger.debug(BIG), number=100_000))
+        results.append(measure('disabled: logger.debug(lambda: big_obj, lazy=True)', lambda: logger.debug(lambda: BIG, lazy=True), number=100_000))
+        results.append(measure('enabled: logger.info("message", 42)', lambda: logger.info('message', 42)))
+        results.append(measure('enabled: logger.info(big_obj)', lambda: logger.info(BIG), number=1_000))
+        recorder = use_flight_recorder(DEFAULT_CAPACITY)
+        try:
+            results.append(measure('recorded: logger.debug(big_obj)', lambda: logger.debug(BIG), number=100_000))
+            results.append(measure('recorded: logger.debug("message", 42)', lambda: logger.debug('message', 42), number=100_000))
+
+            def fill_and_dump():
+                for i in range(DEFAULT_CAPACITY):
+                    logger.debug('message', i)
+                return recorder.dump()
+
+            results.append(measure(f'recorder.dump() of {DEFAULT_CAPACITY} records (including recording them)',
+                                   fill_and_dump, number=20))
+            results.append(_retained_by_full_buffer(logger, recorder))
+        finally:
+            use_flight_recorder(0)
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
@@ -0,0 +1,44 @@
+"""PrettySig binding and `loginout` decorated-call overhead, fully traced and sampled (see `igit_debug.sampling`).
+
+'cold' clears the signature plan cache before every call, i.e. pays for `inspect.getfullargspec` like PrettySig
+did before plans were cached."""
+import contextlib
+import io
+
+from igit_debug import investigate
+from igit_debug.sampling import EveryNth, FirstThenAnomalies
+
+from benchmarks._util import measure, report
+
+
+def fn(a, b=2, *args, c, d=4, **kwargs):
+    return a
+
+
+decorated = investigate.loginout(fn)
+every_100th = investigate.loginout(sample=EveryNth(100))(fn)
+anomalies_only = investigate.loginout(sample=FirstThenAnomalies(0, slow=1.0))(fn)
+
+
+def _cold_prettysig():
+    investigate._sig_plans.clear()
+    return investigate.PrettySig(fn, (1, 2, 3), {'c': 3, 'e': 5})
+
+
+def run() -> list:
+    results = [
+        measure('bare call', lambda: fn(1, 2, 3, c=3, e=5), number=100_000),
+        measure('PrettySig cold', _cold_prettysig),
+        measure('PrettySig warm', lambda: investigate.PrettySig(fn, (1, 2, 3), {'c': 3, 'e': 5})),
+        ]
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        results.append(measure('@loginout call', lambda: (decorated(1, 2, 3, c=3, e=5), sink.seek(0), sink.truncate())))
+        results.append(measure('@loginout(sample=EveryNth(100)) call',
+                               lambda: (every_100th(1, 2, 3, c=3, e=5), sink.seek(0), sink.truncate())))
+        results.append(measure('@loginout(sample=FirstThenAnomalies(0)) call',
+                               lambda: (anomalies_only(1, 2, 3, c=3, e=5), sink.seek(0), sink.truncate())))
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
@@ -0,0 +1,47 @@
+"""`igit_debug.styles` with colors on and off: a single style call, a style over already styled text,
+and what it adds up to in an `ExcHandler.full()` report and a `Loggr.info()` call (output to a logbook.NullHandler)."""
+import contextlib
+import io
+
+import logbook
+
+from igit_debug import ExcHandler, styles
+from igit_debug.loggr import Loggr
+
+from benchmarks._util import measure, report
+
+
+def _raise(depth: int):
+    lokals = {f'var_{i}': i for i in range(10)}
+    if depth == 0:
+        raise ValueError('bad value')
+    _raise(depth - 1)
+
+
+def run() -> list:
+    results = []
+    was_on = styles.enabled
+    try:
+        _raise(50)
+    except ValueError as e:
+        handler = ExcHandler(e)
+        handler.frame_summaries
+    logger = Loggr('bench', level='INFO')
+    nested = f'value {styles.brightwhite("name")} {styles.dark("(int)")}'
+    try:
+        with logbook.NullHandler().applicationbound(), contextlib.redirect_stdout(io.StringIO()):
+            for on in (True, False):
+                styles.set_color(on)
+                state = 'on' if on else 'off'
+                results.append(measure(f'styles.dark("text"), colors {state}', lambda: styles.dark('text'), number=100_000))
+                results.append(measure(f'styles.white(styled text), colors {state}', lambda: styles.white(nested), number=100_000))
+                results.append(measure(f'handler.full(), depth=50, colors {state}', handler.full, number=20, repeat=3))
+                results.append(measure(f'logger.info("message", {{...}}), colors {state}',
+                                       lambda: logger.info('message', {'id': 1, 'name': 'row'}), number=10_000))
+    finally:
+        styles.set_color(was_on)
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
@@ -1 +1,6 @@
-from .exc_handler import ExcHandler
+def __getattr__(name: str):
+    # imported lazily, so importing e.g. igit_debug.loggr doesn't import exc_handler and its dependencies
+    if name == 'ExcHandler':
+        from .exc_handler import ExcHandler
+        return ExcHandler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
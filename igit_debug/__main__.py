@@ -0,0 +1,114 @@
+"""Queries and renders the crash archives written by `igit_debug.archive.CrashArchive`:
+::
+    python -m igit_debug list crashes/ --type KeyError --origin app.views --since 2026-10-01T12:00
+    python -m igit_debug top crashes/ --since 2026-10-01       # entries grouped by fingerprint, most frequent first
+    python -m igit_debug show crashes/ 1234 -1 --render summary
+    python -m igit_debug show crashes/ 1234 --render html > crash.html
+
+Listing and filtering only read the archive's index; `show` reads and renders the requested entries."""
+import argparse
+import datetime
+import itertools
+import sys
+from typing import List
+
+from igit_debug.archive import CrashArchive
+from igit_debug.renderers import RENDERERS
+
+# ExcHandler methods, or `ExcHandler.render()` renderers (for the full report)
+RENDERS = ('full', 'summary', 'short', 'shorter', *(name for name in RENDERERS if name != 'ansi'))
+
+
+def _epoch(value: str) -> float:
+    """Epoch seconds, or an ISO 8601 date / datetime (local time unless it has an offset)."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'not epoch seconds nor an ISO date: {value!r}') from None
+
+
+def _fmt_time(epoch: float) -> str:
+    return datetime.datetime.fromtimestamp(epoch).isoformat(sep=' ', timespec='seconds')
+
+
+def _entries(args):
+    return CrashArchive(args.path).entries(exc_type=args.type, origin=args.origin, since=args.since, until=args.until,
+                                           fingerprint=args.fingerprint)
+
+
+def list_entries(args) -> int:
+    entries = _entries(args)
+    if args.limit is not None:
+        entries = itertools.islice(entries, args.limit)
+    for entry in entries:
+        print(f'{entry.index:>8}  {_fmt_time(entry.time)}  {entry.fingerprint or "-":<16}  {entry.exc_type}  ({entry.origin or "-"})')
+    return 0
+
+
+def top(args) -> int:
+    groups = dict()  # fingerprint: [count, first, last, last entry]
+    for entry in _entries(args):
+        group = groups.get(entry.fingerprint)
+        if group is None:
+            groups[entry.fingerprint] = [1, entry.time, entry.time, entry]
+        else:
+            group[0] += 1
+            group[1] = min(group[1], entry.time)
+            if entry.time >= group[2]:
+                group[2], group[3] = entry.time, entry
+    rows = sorted(groups.values(), key=lambda group: group[0], reverse=True)
+    if args.limit is not None:
+        rows = rows[:args.limit]
+    for count, first, last, entry in rows:
+        print(f'{count:>8}  {entry.fingerprint or "-":<16}  {entry.exc_type} ({entry.origin or "-"})  '
+              f'first: {_fmt_time(first)}, last: {_fmt_time(last)} (#{entry.index})')
+    return 0
+
+
+def show(args) -> int:
+    archive = CrashArchive(args.path)
+    for index in args.indices:
+        try:
+            entry = archive.entry(index)
+        except IndexError as e:
+            print(e, file=sys.stderr)
+            return 1
+        handler = archive.handler(entry)
+        print(f'#{entry.index} at {_fmt_time(entry.time)}')
+        if args.render in RENDERERS:
+            handler.render(renderer=args.render, file=sys.stdout)
+            print()
+        else:
+            print(getattr(handler, args.render)())
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m igit_debug', description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name, help in (('list', 'list entries, oldest first'),
+                       ('top', 'count entries by fingerprint, most frequent first')):
+        command = commands.add_parser(name, help=help)
+        command.add_argument('path', help='the archive directory')
+        command.add_argument('--type', help="the exception type's qualname")
+        command.add_argument('--origin', help="the module the exception was raised in, or a package of it")
+        command.add_argument('--since', type=_epoch, help='epoch seconds or ISO date / datetime, inclusive')
+        command.add_argument('--until', type=_epoch, help='epoch seconds or ISO date / datetime, exclusive')
+        command.add_argument('--fingerprint')
+        command.add_argument('--limit', type=int)
+        command.set_defaults(run=list_entries if name == 'list' else top)
+    show_parser = commands.add_parser('show', help='render entries')
+    show_parser.add_argument('path', help='the archive directory')
+    show_parser.add_argument('indices', nargs='+', type=int, help='entry indices, as listed (negative counts from the end)')
+    show_parser.add_argument('--render', choices=RENDERS, default='full', help='ExcHandler method or renderer (default: %(default)s)')
+    show_parser.set_defaults(run=show)
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
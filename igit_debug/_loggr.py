@@ -0,0 +1,355 @@
+"""The implementation of `igit_debug.loggr`, imported on first use of any of its attributes."""
+import functools
+import os
+import sys
+from contextlib import suppress
+from typing import Callable, Any, Tuple, Optional
+
+from .loggr import config, timed
+
+with timed('logbook'):
+    import logbook
+    from logbook import Logger
+with timed('igit_debug.styles'):
+    from . import styles
+with timed('igit_debug.formatting'):
+    from .flight_recorder import DEFAULT_CAPACITY, CapturedArg, recorder
+    from .formatting import pformat
+    from .util import parse_level
+
+
+# LOG_LEVEL = os.getenv('IGIT_LOG_LEVEL', NOTSET)
+
+def fmt_arg(arg, *, types=False, colorize=True) -> str:
+    """Underlines args ending with ':'.
+    Applies `pformat` on `arg`."""
+    if isinstance(arg, LogMessage):
+        # e.g. logbook's Logger.exception() calls self.error(msg)
+        return (str(arg) if colorize else arg.plain) + ', '
+    if isinstance(arg, CapturedArg):
+        # recorded by the flight recorder
+        return (f'{arg.text} ({arg.type_name})' if types else arg.text) + ', '
+    with suppress(AttributeError):
+        if arg.endswith(':'):
+            types = False
+
+    string = pformat(arg, types=types, colorize=colorize)
+
+    if string.endswith(':'):
+        if not colorize:
+            return string + ' '
+        return styles.ul(string[:-1]) + ': '
+    else:
+        return string + ', '
+
+
+def fmt_args(args: Tuple, *, types=False, varnames=False, colorize=True) -> str:
+    """Splits `args` to separate lines if the resulting string is longer than 80.
+    Applies `fmt_arg` to each `arg`."""
+    formatted_args = [fmt_arg(a, types=types, colorize=colorize) for a in args]
+    if len(args) > 1:
+        sumlen = 0
+        for i, arg in enumerate(args):
+            try:
+                sumlen += len(arg)
+            except TypeError:
+                # None has no len etc
+                # TODO: FormattedArg class with 'nocolor' prop and 'colored' prop
+                #  because formatted has extra ansi strings
+                sumlen += len(str(arg))
+        # sumlen = sum(map(len, args))
+        if sumlen <= 80:
+            joined = ''.join(formatted_args).strip()
+
+        else:
+            joined = '\n' + '\n'.join(formatted_args).strip()
+    else:
+        joined = ''.join(formatted_args).strip()
+
+    if joined.endswith(',') or joined.endswith(':'):
+        return joined[:-1]
+
+
+class LogMessage(str):
+    """The message of a record logged by Loggr: a str, formatted with colors and a style applied
+    (plain if colors are off, see `igit_debug.styles`, or if the output handler is structured, see `use_structured_output`),
+    so handlers and `record.to_dict()` see a str.
+    `msg.plain` is the message without any ANSI codes, formatted only if a handler asks for it
+    (see `igit_debug.handlers.StructuredFormatter`). Pickled as a plain str."""
+
+    def __new__(cls, args, *, types=False, style: Callable[[str], str] = None):
+        if styles.enabled and not plain_messages:
+            text = fmt_args(args, types=types) or ''
+            plain = None
+            if style:
+                text = style(text)
+        else:
+            text = plain = fmt_args(args, types=types, colorize=False) or ''
+        msg = super().__new__(cls, text)
+        msg.args = args
+        msg.types = types
+        msg._plain = plain
+        return msg
+
+    @classmethod
+    def from_text(cls, text, *, style: Callable[[str], str] = None) -> 'LogMessage':
+        """An already formatted message. `text` is converted with `str()` (e.g. an exception)."""
+        text = str(text)
+        msg = str.__new__(cls, style(text) if style and styles.enabled and not plain_messages else text)
+        msg.args = ()
+        msg.types = False
+        msg._plain = text
+        return msg
+
+    @property
+    def plain(self) -> str:
+        if self._plain is None:
+            self._plain = fmt_args(self.args, types=self.types, colorize=False) or ''
+        return self._plain
+
+    def __str__(self):
+        return str.__str__(self)
+
+    def __reduce__(self):
+        return str, (str.__str__(self),)
+
+
+class _MessageArgs:
+    __slots__ = ('args', 'types')
+
+    def __init__(self, args, *, types=False):
+        """What `log_preprocess` passes to Loggr's methods once the level check passed; each method formats it
+        into a LogMessage with its style."""
+        self.args = args
+        self.types = types
+
+    def styled(self, style: Callable[[str], str]) -> LogMessage:
+        return LogMessage(self.args, types=self.types, style=style)
+
+
+def _dark_unless_colored(msg: str) -> str:
+    if '\x1b[' in msg:
+        return msg
+    return styles.dark(msg)
+
+
+def log_preprocess(level: int):
+    # TODO: implement so this:
+    # logger.title(f'TrichDay.post(%prop, val, date%)')
+    # is equivalent to this:
+    # logger.title(f'TrichDay.post(prop={repr(prop)}, val={repr(val)}, date={repr(date)})')
+    def decorator(fn: Callable[['Loggr', str, Any], None]):
+        @functools.wraps(fn)
+        def logwrap(selfarg: 'Loggr', *args, **kwargs):
+            """From kwargs:
+             only_verbose, types, varnames, lazy, frame_correction.
+
+             From `config`:
+             verbose (IGIT_VERBOSE)
+
+             Returns before any formatting if `level` is disabled for `selfarg`
+             (after recording the call, if the flight recorder is on; see `use_flight_recorder`).
+             lazy=True: callable args are called (without arguments) only if the record is going to be logged.
+            """
+            if selfarg.disabled or level < selfarg.level:
+                if recorder.capacity and level >= recorder.level and not selfarg.disabled:
+                    recorder.record(level, args, kwargs.get('types', False), kwargs.get('lazy', False))
+                return
+            if kwargs.pop('only_verbose', False) or selfarg.only_verbose:
+                if not config.verbose:
+                    return
+            types = kwargs.pop('types', False)
+            varnames = kwargs.pop('varnames', False)
+            if kwargs.pop('lazy', False):
+                args = [arg() if callable(arg) else arg for arg in args]
+            if varnames:
+                from .investigate import getvarnames
+                vnames: dict = getvarnames(*args)
+                args = []
+                for name, value in vnames.items():
+                    args.append(f'{name}:')
+                    args.append(value)
+            msg = _MessageArgs(args, types=types)
+            if (frame_correction := kwargs.get('frame_correction')) is None:
+                kwargs['frame_correction'] = 2
+            else:
+                kwargs['frame_correction'] = int(frame_correction) + 2
+            return fn(selfarg, msg, **kwargs)
+
+        return logwrap
+
+    return decorator
+
+
+class Loggr(Logger):
+
+    def __init__(self, name=None, level=os.getenv('IGIT_LOG_LEVEL', 'NOTSET'), *, only_verbose=False):
+        """'info' is higher than 'debug'.
+        frame_correction=2, only_verbose=False, types=False, varnames=False.
+        :param bool only_verbose:
+        """
+        if config.verbose:
+            print(f"Loggr __init__, level: {level}, only_verbose: {only_verbose}")
+        _ensure_output_handler()
+        level = parse_level(level)
+        super().__init__(name, level)
+        self.only_verbose = only_verbose
+
+    @log_preprocess(logbook.DEBUG)
+    def debug(self, msg, **kwargs):
+        super().debug(msg.styled(_dark_unless_colored), **kwargs)
+
+    @log_preprocess(logbook.INFO)
+    def info(self, msg, **kwargs):
+        super().info(msg.styled(styles.white), **kwargs)
+
+    @log_preprocess(logbook.INFO)
+    def good(self, msg, **kwargs):
+        super().info(msg.styled(styles.green), **kwargs)
+
+    @log_preprocess(logbook.WARNING)
+    def warn(self, msg, **kwargs):
+        super().warning(msg.styled(styles.yellow), **kwargs)
+
+    warning = warn
+
+    @log_preprocess(logbook.WARNING)
+    def boldwarn(self, msg, **kwargs):
+        super().warning(msg.styled(styles.bold_yellow), **kwargs)
+
+    @log_preprocess(logbook.ERROR)
+    def error(self, msg, **kwargs):
+        super().error(msg.styled(styles.red), **kwargs)
+
+    def exception(self, *args, background=False, **kwargs):
+        """Identical exceptions beyond `registry.max_reports` per `registry.window` are only counted
+        (see `igit_debug.fingerprint.registry.table()`).
+        With the flight recorder on (see `use_flight_recorder`), the thread's unlogged records are logged along.
+        :param bool background: render the exception with `ExcHandler.full()` on a background thread
+         (see `igit_debug.background.reporter`), and log it from there as an error."""
+        exc = sys.exc_info()[1]
+        if exc is not None:
+            from .fingerprint import registry
+            occurrence = registry.record(exc)
+            if occurrence is None:
+                return
+            if note := registry.suppressed_note(occurrence):
+                args = (f'{args[0]} {note}', *args[1:])
+            if background:
+                from .background import reporter
+                msg = styles.brightred(str(args[0]))  # the ExcHandler shows the flight recorder's records
+                reporter.submit(exc, output=lambda report: Logger.error(self, f'{msg}\n{report}'))
+                return
+        if recorder.capacity and (dump := recorder.dump()):
+            args = (f'{args[0]}\n{dump if plain_messages else styles.dark(dump)}', *args[1:])
+        if len(args) == 1:
+            super().exception(LogMessage.from_text(args[0], style=styles.brightred), **kwargs)
+        else:
+            super().exception(styles.brightred(str(args[0])), *args[1:], **kwargs)
+
+    @log_preprocess(logbook.INFO)
+    def title(self, msg, **kwargs):
+        super().info(msg.styled(styles.bold_white), **kwargs)
+
+    def bylevel(self, msg, *, level, **kwargs):
+        try:
+            fn = getattr(self, level.lower())
+        except AttributeError as e:
+            fn = self.debug
+        return fn(msg, **kwargs)
+
+    # ** decorators
+    def logonreturn(self, *variables, types=False, level='DEBUG', sample: 'SamplingPolicy' = None):
+        """@logonreturn('self.answer', types=True)
+        @logonreturn('self.answer', sample=EveryNth(100))
+        Currently only works for args passed in signatures. See `igit_debug.sampling` for sampling policies."""
+        from .investigate import _print_variables, _remember_args, _wrap
+        from .sampling import anomaly_note, sampled
+
+        def wrapper(fn):
+
+            def leave(fn_args_kwargs, _, __):
+                # if not variables:
+                #     print(styles.brightyellow(f'logonreturn({identifier}) no variables. returning retval as-is'))
+                #     return retval
+                # TODO:
+                #  if var is not found, try get fn locals
+                #  file = inspect.getsourcefile(fn)
+                #  f = next frame in sys._getframe(n) if file in str(frame)
+                #
+                _print_variables(fn, *fn_args_kwargs, variables, types=types,
+                                 output=lambda line: self.bylevel(line, level=level))
+
+            def report(fn_args, fn_kwargs, retval, exc, elapsed):
+                _print_variables(fn, fn_args, fn_kwargs, variables, types=types,
+                                 output=lambda line: self.bylevel(f'{line} {anomaly_note(exc, elapsed)}', level=level))
+
+            return sampled(fn, sample, _wrap(fn, _remember_args, leave), report)
+
+        return wrapper
+
+
+FORMAT_STRING = '{record.time:%T.%f} | {record.module}.{record.func_name}() | {record.message}'
+
+
+def set_output_handler(handler: logbook.Handler) -> logbook.Handler:
+    """Replaces the application-wide handler Loggr writes to. Returns `handler`.
+    If its formatter only uses plain messages (e.g. `igit_debug.handlers.StructuredFormatter`), messages aren't colored."""
+    global output_handler, plain_messages
+    if output_handler is not None:
+        output_handler.pop_application()
+        output_handler.close()
+    handler.push_application()
+    output_handler = handler
+    plain_messages = getattr(handler.formatter, 'plain_messages', False)
+    return handler
+
+
+def use_queued_output(stream=None, **kwargs) -> 'QueuedStreamHandler':
+    """Writes to `stream` (stdout by default) from a background thread, in batches.
+    See `igit_debug.handlers.QueuedStreamHandler` for `kwargs` (maxsize, overflow, batch_size...)."""
+    from .handlers import QueuedStreamHandler
+    kwargs.setdefault('format_string', FORMAT_STRING)
+    return set_output_handler(QueuedStreamHandler(stream, **kwargs))
+
+
+def use_structured_output(stream=None, fmt='json', *, queued=False, **kwargs) -> logbook.StreamHandler:
+    """Writes records to `stream` (stdout by default) as JSON lines (fmt='json') or key=value lines (fmt='kv'), without colors.
+    queued=True: write from a background thread (see `use_queued_output`).
+    To make only a specific handler structured, set its formatter to an `igit_debug.handlers.StructuredFormatter`."""
+    from .handlers import QueuedStreamHandler, StructuredFormatter
+    if queued:
+        handler = QueuedStreamHandler(stream, **kwargs)
+    else:
+        handler = logbook.StreamHandler(sys.stdout if stream is None else stream, **kwargs)
+    handler.formatter = StructuredFormatter(fmt)
+    return set_output_handler(handler)
+
+
+def use_forwarded_output(address, authkey: bytes = None, **kwargs) -> 'ForwardingHandler':
+    """Sends records to the `igit_debug.collector.LogCollector` listening on `address`, which writes the records of all
+    processes in order. Meant as a multiprocessing / ProcessPoolExecutor initializer, with `initargs=collector.initargs`.
+    See `igit_debug.collector.ForwardingHandler` for `kwargs` (batch_size, fallback_stream...)."""
+    from .collector import ForwardingHandler
+    kwargs.setdefault('format_string', FORMAT_STRING)
+    return set_output_handler(ForwardingHandler(address, authkey, **kwargs))
+
+
+def use_flight_recorder(capacity: int = DEFAULT_CAPACITY, level='DEBUG') -> 'FlightRecorder':
+    """Keeps the last `capacity` records per thread at `level` and above that Loggrs don't log (because they're below
+    the Loggr's level), unformatted, and logs them when the thread logs an exception. capacity=0 turns it off.
+    See `igit_debug.flight_recorder.FlightRecorder`."""
+    recorder.configure(capacity, parse_level(level))
+    return recorder
+
+
+output_handler: Optional[logbook.Handler] = None
+plain_messages = False  # LogMessages are formatted without colors only (see `set_output_handler`)
+
+
+def _ensure_output_handler():
+    """Installs the default stdout handler when the first Loggr is created, unless one was set with `set_output_handler`."""
+    if output_handler is None:
+        with timed('output handler'):
+            set_output_handler(logbook.StreamHandler(sys.stdout, format_string=FORMAT_STRING))
+# logbook.FileHandler()
@@ -0,0 +1,229 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process
+    fcntl = None
+
+from igit_debug.exc_handler import ExcHandler
+
+# index file: an 8 bytes header, then one fixed-size entry per crash, in append order
+INDEX_MAGIC = b'IGCX'
+INDEX_VERSION = 1
+# offset and length of the compressed record in the data file, time, fingerprint, exception type id, origin module id
+# (ids are line numbers in the strings file)
+INDEX_ENTRY = struct.Struct('<QIdQII')
+_INDEX_HEADER = struct.Struct('<4sHH')
+_NO_FINGERPRINT = 0
+_NO_STRING = 0xFFFFFFFF
+_READ_ENTRIES = 64 * 1024  # entries() copies this many index entries out of the mmap at a time
+
+
+class ArchiveEntry:
+    """An index entry: everything `CrashArchive.entries()` filters by, without reading the record itself."""
+    __slots__ = ('index', 'time', 'fingerprint', 'exc_type', 'origin', '_offset', '_length')
+
+    def __init__(self, index: int, offset: int, length: int, time: float, fingerprint: Optional[str],
+                 exc_type: str, origin: Optional[str]):
+        self.index = index
+        self.time = time
+        self.fingerprint = fingerprint
+        self.exc_type = exc_type
+        self.origin = origin
+        self._offset = offset
+        self._length = length
+
+    def __repr__(self):
+        return f'ArchiveEntry({self.index}: {self.exc_type} from {self.origin} at {self.time:.3f}, fingerprint={self.fingerprint})'
+
+
+class CrashArchive:
+    def __init__(self, path: Union[str, Path]):
+        """
+        An append-only on-disk archive of exception reports, in the `path` directory (created if needed).
+        `append()` stores what `ExcHandler.full()` needs (frames, rendered locals, linked exceptions, fingerprint)
+        instead of rendering it; reports are rendered later, e.g. with the CLI:
+        ::
+            except Exception as e:
+                archive.append(e)
+
+            $ python -m igit_debug list crashes/ --type KeyError --since 2026-10-01
+            $ python -m igit_debug show crashes/ 1234
+
+        The directory holds 3 files:
+         'data': the zlib compressed JSON records, back to back.
+         'index': a fixed-size entry per record (see INDEX_ENTRY), memory-mapped when querying,
+          so listing and filtering don't read or decompress records.
+         'strings': the exception type and module names the index entries refer to, one per line.
+        Several processes can append to the same archive (on posix, appends are serialized with flock).
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._data_path = self.path / 'data'
+        self._index_path = self.path / 'index'
+        self._strings_path = self.path / 'strings'
+        self._strings: List[str] = []
+        self._string_ids: Dict[str, int] = dict()
+        self._strings_size = 0
+        self._lock = threading.Lock()
+
+    def append(self, exc: Union[BaseException, ExcHandler], *, when: float = None) -> int:
+        """Archives `exc` (an exception or an ExcHandler), and returns its entry index.
+        Costs rendering its locals (bounded like ExcHandler(snapshot=True)), compressing and 2 writes."""
+        handler = exc if isinstance(exc, ExcHandler) else ExcHandler(exc, snapshot=True)
+        record = handler.record()
+        record['time'] = time.time() if when is None else when
+        payload = zlib.compress(json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        fingerprint = int(record['fingerprint'], 16) if record['fingerprint'] else _NO_FINGERPRINT
+        with self._lock, open(self._index_path, 'ab') as index_file:
+            if fcntl is not None:
+                fcntl.flock(index_file, fcntl.LOCK_EX)  # released when closed
+            # other processes may have appended since the files were opened, and tell() in append mode doesn't follow
+            index_file.seek(0, os.SEEK_END)
+            type_id = self._string_id(record['type'])
+            origin_id = _NO_STRING if record['origin'] is None else self._string_id(record['origin'])
+            with open(self._data_path, 'ab') as data_file:
+                offset = data_file.seek(0, os.SEEK_END)
+                data_file.write(payload)
+            if index_file.tell() == 0:
+                index_file.write(_INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, INDEX_ENTRY.size))
+            index = (index_file.tell() - _INDEX_HEADER.size) // INDEX_ENTRY.size
+            index_file.write(INDEX_ENTRY.pack(offset, len(payload), record['time'], fingerprint, type_id, origin_id))
+        return index
+
+    def __len__(self):
+        try:
+            size = self._index_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+        return max(size - _INDEX_HEADER.size, 0) // INDEX_ENTRY.size
+
+    def entries(self, *,
+                exc_type: str = None,
+                origin: str = None,
+                since: float = None,
+                until: float = None,
+                fingerprint: str = None) -> Iterator[ArchiveEntry]:
+        """
+        Index entries, oldest first, optionally filtered. Reads only the (memory-mapped) index and the strings file.
+
+        :param str exc_type: the exception type's qualname.
+        :param str origin: the module the exception was raised in, or a package of it ('app' matches 'app.views').
+        :param float since: epoch time, inclusive.
+        :param float until: epoch time, exclusive.
+        :param str fingerprint: see `igit_debug.fingerprint`.
+        """
+        wanted_fingerprint = None if fingerprint is None else int(fingerprint, 16)
+        try:
+            index_file = open(self._index_path, 'rb')
+        except FileNotFoundError:
+            return
+        with index_file:
+            count = len(self)
+            if not count:
+                return
+            with mmap.mmap(index_file.fileno(), _INDEX_HEADER.size + count * INDEX_ENTRY.size, access=mmap.ACCESS_READ) as mm:
+                magic, version, entry_size = _INDEX_HEADER.unpack_from(mm)
+                if magic != INDEX_MAGIC or version != INDEX_VERSION or entry_size != INDEX_ENTRY.size:
+                    raise ValueError(f'{self._index_path} is not a version {INDEX_VERSION} crash archive index')
+                # strings are written before the entries that refer to them, so loading them after mapping the index
+                # gets every id the mapped entries have
+                with self._lock:
+                    self._load_strings()
+                strings = self._strings
+                type_ids = origin_ids = None
+                if exc_type is not None:
+                    type_ids = {i for i, string in enumerate(strings) if string == exc_type}
+                    if not type_ids:
+                        return
+                if origin is not None:
+                    origin_ids = {i for i, string in enumerate(strings) if string == origin or string.startswith(origin + '.')}
+                    if not origin_ids:
+                        return
+                end = _INDEX_HEADER.size + count * INDEX_ENTRY.size
+                index = 0
+                for start in range(_INDEX_HEADER.size, end, _READ_ENTRIES * INDEX_ENTRY.size):
+                    chunk = mm[start:min(start + _READ_ENTRIES * INDEX_ENTRY.size, end)]
+                    for offset, length, when, fp, type_id, origin_id in INDEX_ENTRY.iter_unpack(chunk):
+                        index += 1
+                        if ((since is not None and when < since)
+                                or (until is not None and when >= until)
+                                or (type_ids is not None and type_id not in type_ids)
+                                or (origin_ids is not None and origin_id not in origin_ids)
+                                or (wanted_fingerprint is not None and fp != wanted_fingerprint)):
+                            continue
+                        yield ArchiveEntry(index - 1, offset, length, when, None if fp == _NO_FINGERPRINT else f'{fp:016x}',
+                                           self._string(type_id), None if origin_id == _NO_STRING else self._string(origin_id))
+
+    def entry(self, index: int) -> ArchiveEntry:
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError(f'crash archive {self.path} has {count} entries, no entry {index}')
+        with open(self._index_path, 'rb') as index_file:
+            index_file.seek(_INDEX_HEADER.size + index * INDEX_ENTRY.size)
+            offset, length, when, fp, type_id, origin_id = INDEX_ENTRY.unpack(index_file.read(INDEX_ENTRY.size))
+        return ArchiveEntry(index, offset, length, when, None if fp == _NO_FINGERPRINT else f'{fp:016x}',
+                            self._string(type_id), None if origin_id == _NO_STRING else self._string(origin_id))
+
+    def record(self, entry: Union[int, ArchiveEntry]) -> dict:
+        """The `ExcHandler.record()` of an entry, plus its 'time'."""
+        if not isinstance(entry, ArchiveEntry):
+            entry = self.entry(entry)
+        with open(self._data_path, 'rb') as data_file:
+            data_file.seek(entry._offset)
+            payload = data_file.read(entry._length)
+        return json.loads(zlib.decompress(payload))
+
+    def handler(self, entry: Union[int, ArchiveEntry]) -> ExcHandler:
+        """An ExcHandler restored from an entry, e.g. `archive.handler(-1).full()`."""
+        return ExcHandler.from_record(self.record(entry))
+
+    def _string(self, string_id: int) -> str:
+        """The string of an index entry's id, loading strings added since the last time if needed."""
+        try:
+            return self._strings[string_id]
+        except IndexError:
+            with self._lock:
+                self._load_strings()
+        try:
+            return self._strings[string_id]
+        except IndexError:
+            raise ValueError(f'{self._strings_path} has no string {string_id}; the crash archive is corrupt') from None
+
+    def _string_id(self, string: str) -> int:
+        """Called with the index file locked, so ids are consistent across processes."""
+        string = string.replace('\n', ' ')
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            self._load_strings()  # another process may have added it
+            string_id = self._string_ids.get(string)
+        if string_id is None:
+            with open(self._strings_path, 'a', encoding='utf-8', newline='\n') as strings_file:
+                strings_file.write(string + '\n')
+            self._load_strings()
+            string_id = self._string_ids[string]
+        return string_id
+
+    def _load_strings(self):
+        """Reads the strings added since the last time."""
+        try:
+            with open(self._strings_path, 'rb') as strings_file:
+                strings_file.seek(self._strings_size)
+                added = strings_file.read()
+        except FileNotFoundError:
+            return
+        complete = added[:added.rfind(b'\n') + 1]  # a line being written by another process is read next time
+        self._strings_size += len(complete)
+        for line in complete.decode('utf-8').splitlines():
+            self._string_ids.setdefault(line, len(self._strings))
+            self._strings.append(line)
@@ -0,0 +1,259 @@
+import atexit
+import queue
+import sys
+import threading
+from typing import Callable, Optional
+
+from igit_debug import styles
+from igit_debug.exc_handler import ExcHandler
+from igit_debug.formatting import bounded_repr
+
+# overflow policies, for when the queue is full
+DROP_NEWEST = 'drop_newest'
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+
+_STOP = object()
+
+
+def check_overflow(overflow: str):
+    if overflow not in (DROP_NEWEST, DROP_OLDEST, BLOCK):
+        raise ValueError(f"overflow must be one of {DROP_NEWEST!r}, {DROP_OLDEST!r}, {BLOCK!r}, got {overflow!r}")
+
+
+def put(q: queue.Queue, item, overflow: str) -> int:
+    """Puts `item` in `q` according to the `overflow` policy (DROP_NEWEST, DROP_OLDEST or BLOCK).
+    Returns how many items were dropped (0 or 1)."""
+    if overflow == BLOCK:
+        q.put(item)
+        return 0
+    try:
+        q.put_nowait(item)
+        return 0
+    except queue.Full:
+        if overflow != DROP_OLDEST:
+            return 1
+    try:
+        q.get_nowait()
+        q.task_done()
+    except queue.Empty:
+        pass
+    try:
+        q.put_nowait(item)
+    except queue.Full:
+        pass  # dropped the newest after all; still one dropped
+    return 1
+
+
+class QueueWorker:
+    failure = 'processing {} items'  # completed with the number of items, when processing them raised
+
+    def __init__(self, *,
+                 maxsize: int,
+                 overflow: str,
+                 batch_size: Optional[int] = None,
+                 exit_timeout: Optional[float] = 5.0):
+        """
+        A bounded queue drained by a daemon thread, which is started on first use and stopped at interpreter exit.
+        The worker takes up to `batch_size` (None: all) waiting items at a time and passes them to `_process()`,
+        which subclasses implement. `close()` (and exit) never blocks longer than its timeout, even if the queue is full.
+
+        :param int maxsize: max items waiting to be processed.
+        :param str overflow: what `_enqueue()` does when the queue is full (DROP_NEWEST, DROP_OLDEST or BLOCK).
+         Dropped items are counted in `self.dropped`.
+        :param float exit_timeout: at interpreter exit, wait this many seconds (None: indefinitely) for waiting items to be processed.
+        """
+        check_overflow(overflow)
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.exit_timeout = exit_timeout
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize)
+        self._worker: Optional[threading.Thread] = None
+        self._stopping: Optional[threading.Event] = None
+        self._worker_lock = threading.Lock()
+
+    def _enqueue(self, item) -> int:
+        """Starts the worker if needed and puts `item` according to `overflow`. Returns how many items were dropped."""
+        self._ensure_worker()
+        dropped = put(self._queue, item, self.overflow)
+        self.dropped += dropped
+        return dropped
+
+    def flush(self):
+        """Blocks until every enqueued item was processed."""
+        if self._worker is not None:
+            self._queue.join()
+
+    def close(self, timeout: Optional[float] = None):
+        """Processes waiting items and stops the worker, waiting at most `timeout` seconds. Enqueueing again restarts it."""
+        with self._worker_lock:
+            worker, self._worker = self._worker, None
+            stopping = self._stopping
+        atexit.unregister(self._close_at_exit)
+        if worker is None:
+            return
+        stopping.set()
+        try:
+            self._queue.put_nowait(_STOP)  # wakes the worker if it's waiting for items
+        except queue.Full:
+            pass  # it isn't; it stops once it emptied the queue
+        worker.join(timeout)
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is not None:
+                return
+            self._stopping = threading.Event()
+            self._worker = threading.Thread(target=self._work, args=(self._stopping,),
+                                            name=f'igit_debug.{self.__class__.__name__}', daemon=True)
+            self._worker.start()
+            atexit.register(self._close_at_exit)
+
+    def _close_at_exit(self):
+        self.close(self.exit_timeout)
+
+    def _work(self, stopping: threading.Event):
+        batch_size = self.batch_size
+        while True:
+            if stopping.is_set() and self._queue.empty():
+                return
+            batch = []
+            gotten = 1
+            item = self._queue.get()
+            while True:
+                if item is not _STOP:  # a _STOP left by a previous worker doesn't stop this one
+                    batch.append(item)
+                    if len(batch) == batch_size:
+                        break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                gotten += 1
+            try:
+                if batch:
+                    self._process(batch)
+            except Exception as e:
+                print(f'{self.__class__.__name__} failed {self.failure.format(len(batch))}: {e.__class__.__qualname__}: {e}',
+                      file=sys.stderr)
+            finally:
+                for _ in range(gotten):
+                    self._queue.task_done()
+
+    def _process(self, batch: list):
+        """Runs on the worker thread with up to `batch_size` enqueued items."""
+        raise NotImplementedError
+
+
+def shallow_repr(obj) -> str:
+    """`bounded_repr` with small budgets (200 chars, 10 items, 2 levels), for locals captured on the raising thread."""
+    return bounded_repr(obj, max_chars=200, max_items=10, max_depth=2)
+
+
+def render_full(handler: ExcHandler, *extra) -> str:
+    return styles.brightred(handler.full(*extra))
+
+
+class BackgroundReporter(QueueWorker):
+    failure = 'outputting a report'
+
+    def __init__(self, *,
+                 maxsize: int = 1000,
+                 overflow: str = DROP_NEWEST,
+                 render: Callable[..., str] = render_full,
+                 output: Callable[[str], None] = print,
+                 formatter: Callable[[object], str] = shallow_repr,
+                 exit_timeout: Optional[float] = 5.0):
+        """
+        Renders and outputs exception reports on a background thread.
+        The raising thread only pays for snapshotting the exception (`ExcHandler(snapshot=True)`: frame summaries and
+        size-capped locals reprs) and for enqueueing it; the worker renders and outputs. Example:
+        ::
+            except Exception as e:
+                reporter.submit(e)
+
+        Locals show their values at the time of `submit()`, and waiting reports don't keep tracebacks or frames alive,
+        so the queue's memory is bounded by `maxsize` and the snapshot budgets.
+
+        :param int maxsize: max reports waiting to be rendered.
+        :param str overflow: what `submit()` does when the queue is full.
+         'drop_newest' (default): the submitted report is dropped.
+         'drop_oldest': the oldest waiting report is dropped to make room.
+         'block': wait until there's room.
+         Dropped reports are counted in `self.dropped`.
+        :param render: `render(handler, *extra) -> str`, runs on the worker thread.
+        :param output: called with the rendered report, on the worker thread. Can be overridden per `submit()`.
+        :param formatter: renders each local on the raising thread. `shallow_repr` by default, so submitting stays cheap.
+        :param float exit_timeout: at interpreter exit, wait this many seconds (None: indefinitely) for waiting reports to be output.
+        """
+        super().__init__(maxsize=maxsize, overflow=overflow, batch_size=1, exit_timeout=exit_timeout)
+        self.render = render
+        self.output = output
+        self.formatter = formatter
+
+    def submit(self, exc: BaseException = None, *extra, output: Callable[[str], None] = None) -> bool:
+        """Snapshots `exc` (or the exception being handled) and enqueues it.
+        Returns False if the report was dropped because the queue is full."""
+        handler = ExcHandler(exc, snapshot=True, formatter=self.formatter)
+        if not handler.exc:
+            return False
+        dropped = self._enqueue((handler, extra, output))
+        return not dropped or self.overflow == DROP_OLDEST
+
+    def _process(self, batch: list):
+        handler, extra, output = batch[0]
+        (output or self.output)(self.render(handler, *extra))
+
+
+reporter = BackgroundReporter()
+
+
+class LineWriter(QueueWorker):
+    failure = 'writing {} lines'
+
+    def __init__(self, stream=None, *,
+                 maxsize: int = 10_000,
+                 overflow: str = DROP_NEWEST,
+                 exit_timeout: Optional[float] = 5.0):
+        """
+        Writes lines to `stream` from a background thread, so that writing never blocks the calling thread
+        (e.g. a thread running an asyncio event loop). Lines waiting together are written at once.
+        See `loop_safe_output()`.
+
+        :param stream: sys.stdout (at the time of writing) by default.
+        :param int maxsize: max lines waiting to be written.
+        :param str overflow: what `write()` does when the queue is full. See `BackgroundReporter`.
+        :param float exit_timeout: at interpreter exit, wait this many seconds (None: indefinitely) for waiting lines to be written.
+        """
+        super().__init__(maxsize=maxsize, overflow=overflow, exit_timeout=exit_timeout)
+        self.stream = stream
+
+    def write(self, line: str):
+        """Enqueues `line` (a newline is appended)."""
+        self._enqueue(line)
+
+    def _process(self, batch: list):
+        stream = sys.stdout if self.stream is None else self.stream
+        stream.write(''.join(f'{line}\n' for line in batch))
+        stream.flush()
+
+
+writer = LineWriter()
+
+
+def loop_safe_output() -> Callable[[str], None]:
+    """
+    `print`, unless called on a thread running an asyncio event loop. Then, a function that hands the line to `writer`
+    (so the loop never blocks on stdout), prefixed with the name of the current task, e.g. "[Task-3] ".
+    """
+    asyncio = sys.modules.get('asyncio')
+    if asyncio is None or asyncio._get_running_loop() is None:
+        return print
+    task = asyncio.current_task()
+    if task is None:
+        return writer.write
+    label = f'[{task.get_name()}] '
+    return lambda line: writer.write(label + line)
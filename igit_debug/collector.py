@@ -0,0 +1,182 @@
+import heapq
+import itertools
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from multiprocessing.util import Finalize
+from typing import List, Optional, Tuple
+
+from igit_debug.handlers import QueuedStreamHandler
+
+_STOP = object()
+
+
+class LogCollector:
+    def __init__(self, stream=None, *,
+                 address=None,
+                 authkey: bytes = None,
+                 reorder_window: float = 0.05):
+        """
+        Collects the records of Loggrs running in other processes (multiprocessing / ProcessPoolExecutor workers),
+        and writes them to `stream` from a single thread, ordered by time, without interleaving lines.
+        Listens right away on a Unix socket (a named pipe on Windows); workers connect to it with
+        `igit_debug.loggr.use_forwarded_output`, typically as the pool's initializer:
+        ::
+            with LogCollector() as collector, \\
+                    ProcessPoolExecutor(initializer=use_forwarded_output, initargs=collector.initargs) as pool:
+                ...
+
+        :param stream: sys.stdout by default.
+        :param address: passed to `multiprocessing.connection.Listener`. A fresh temporary address by default.
+        :param bytes authkey: workers must use the same key. Defaults to the current process' authkey,
+         which multiprocessing children inherit.
+        :param float reorder_window: records are held up to this many seconds, so that records sent a bit late
+         by other workers are still written in order.
+        """
+        self.stream = sys.stdout if stream is None else stream
+        self.reorder_window = reorder_window
+        self.authkey = multiprocessing.current_process().authkey if authkey is None else authkey
+        self.received = 0
+        self._listener = Listener(address, authkey=self.authkey)
+        self._queue = queue.Queue()
+        self._readers: List[threading.Thread] = []
+        self._closing = False
+        self._acceptor = threading.Thread(target=self._accept, name='igit_debug.LogCollector.accept', daemon=True)
+        self._writer = threading.Thread(target=self._write_ordered, name='igit_debug.LogCollector.write', daemon=True)
+        self._acceptor.start()
+        self._writer.start()
+
+    @property
+    def address(self):
+        return self._listener.address
+
+    @property
+    def initargs(self) -> Tuple:
+        """(address, authkey), the args of `use_forwarded_output` that connect to this collector."""
+        return self.address, self.authkey
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Stops accepting workers, waits up to `timeout` seconds for connected workers to disconnect,
+        writes whatever was received and stops."""
+        if self._closing:
+            return
+        self._closing = True
+        try:
+            Client(self.address, authkey=self.authkey).close()  # wakes up accept()
+        except OSError:
+            pass
+        self._acceptor.join(timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for reader in list(self._readers):
+            reader.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        self._listener.close()
+        self._queue.put(_STOP)
+        self._writer.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError) as e:
+                if self._closing:
+                    return
+                print(f'LogCollector failed accepting a worker: {e.__class__.__qualname__}: {e}', file=sys.stderr)
+                continue
+            if self._closing:
+                conn.close()
+                return
+            reader = threading.Thread(target=self._read, args=(conn,), name='igit_debug.LogCollector.read', daemon=True)
+            self._readers.append(reader)
+            reader.start()
+
+    def _read(self, conn: Connection):
+        with conn:
+            while True:
+                try:
+                    batch = conn.recv()
+                except (EOFError, OSError):
+                    return
+                self._queue.put(batch)
+
+    def _write_ordered(self):
+        pending = []  # heap of (time, seq, text)
+        seq = itertools.count()
+        stop = False
+        while not stop:
+            try:
+                batch = self._queue.get(timeout=self.reorder_window if pending else None)
+            except queue.Empty:
+                batch = None
+            while batch is not None:
+                if batch is _STOP:
+                    stop = True
+                    break
+                self.received += len(batch)
+                for sent_at, text in batch:
+                    heapq.heappush(pending, (sent_at, next(seq), text))
+                try:
+                    batch = self._queue.get_nowait()
+                except queue.Empty:
+                    batch = None
+            horizon = float('inf') if stop else time.time() - self.reorder_window
+            ready = []
+            while pending and pending[0][0] <= horizon:
+                ready.append(heapq.heappop(pending)[2])
+            if not ready:
+                continue
+            try:
+                self.stream.write(''.join(ready))
+                self.stream.flush()
+            except Exception as e:
+                print(f'LogCollector failed writing {len(ready)} records: {e.__class__.__qualname__}: {e}', file=sys.stderr)
+
+
+class ForwardingHandler(QueuedStreamHandler):
+    def __init__(self, address, authkey: bytes = None, *,
+                 fallback_stream=None,
+                 **kwargs):
+        """
+        A `QueuedStreamHandler` that sends its records to a `LogCollector` (possibly in another process) instead of writing them.
+        Records are formatted by the logging thread; the background writer sends up to `batch_size` of them at a time.
+        Records that can't be sent (e.g. the collector is gone) are written to `fallback_stream` (stderr by default).
+        Waiting records are also sent when a multiprocessing worker exits, where atexit handlers don't run.
+
+        :param address: the collector's `address`.
+        :param bytes authkey: defaults to the current process' authkey.
+        :param kwargs: passed to `QueuedStreamHandler` (maxsize, overflow, batch_size, format_string...).
+        """
+        super().__init__(sys.stderr if fallback_stream is None else fallback_stream, **kwargs)
+        self.address = address
+        self.authkey = multiprocessing.current_process().authkey if authkey is None else authkey
+        self._conn: Optional[Connection] = None
+        self._finalizer = Finalize(self, self._close_at_exit, exitpriority=10)
+
+    def emit(self, record):
+        self._enqueue((time.time(), self.encode(self.format(record))))
+
+    def close(self, timeout: Optional[float] = None):
+        self._finalizer.cancel()
+        super().close(timeout)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _process(self, batch: list):
+        try:
+            if self._conn is None:
+                self._conn = Client(self.address, authkey=self.authkey)
+            self._conn.send(batch)
+        except Exception as e:
+            self._conn = None
+            print(f'ForwardingHandler failed sending {len(batch)} records to {self.address!r}, writing them here: '
+                  f'{e.__class__.__qualname__}: {e}', file=sys.stderr)
+            super()._process([text for _, text in batch])
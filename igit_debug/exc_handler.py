@@ -1,49 +1,325 @@
+import builtins
+import copy
+import functools
 import inspect
 import sys
+import threading
 import traceback
 from types import ModuleType
-from typing import List, Union
+from typing import Iterator, List, Union, Optional, Set, Tuple, Type
 
-from more_termcolor import colors
+from igit_debug import styles
+from igit_debug.fingerprint import fingerprint
+from igit_debug.flight_recorder import format_records, recorder
+from igit_debug.formatting import bounded_repr
+from igit_debug.frames import classifier
+from igit_debug.renderers import AnsiRenderer, Renderer, get_renderer
 
 FrameSummaries = List[List[Union[int, traceback.FrameSummary]]]
 
+# snapshot=True budgets
+SNAPSHOT_VALUE_BYTES = 1024
+SNAPSHOT_FRAME_BYTES = 16 * 1024
+
+# how a linked exception relates to the one before it (or, for GROUP, to its ExceptionGroup)
+CAUSE = 'cause'  # raise ... from exc
+CONTEXT = 'context'  # raised while handling exc
+GROUP = 'group'  # one of an ExceptionGroup's exceptions
+# linked exceptions beyond this many are counted but not rendered
+MAX_LINKED = 32
+
+_BaseExceptionGroup = getattr(builtins, 'BaseExceptionGroup', None)  # python 3.11+
+
+
+class LocalSnapshot:
+    """A local variable, already rendered by ExcHandler's formatter and capped in size.
+    Holds no reference to the original value."""
+    __slots__ = ('val', 'typ')
+
+    def __init__(self, val: str, typ: str):
+        self.val = val
+        self.typ = typ
+
+    def __repr__(self):
+        return self.val
+
+
+class LinkedFrame:
+    """A user frame of a linked exception's traceback.
+    `repeated`: the same frame, at the same line, was already rendered (by the top exception or an earlier linked one),
+    so it's only referenced. `locals_above`: the same frame (at another line) was, so are its locals."""
+    __slots__ = ('summary', 'repeated', 'locals_above')
+
+    def __init__(self, summary: traceback.FrameSummary, *, repeated=False, locals_above=False):
+        self.summary = summary
+        self.repeated = repeated
+        self.locals_above = locals_above
+
+
+class LinkedException:
+    """An exception reachable from ExcHandler's exception through __cause__, __context__ or ExceptionGroup.exceptions.
+    Holds its type name, formatted args and frames, but no reference to the exception itself."""
+    __slots__ = ('relation', 'level', 'position', 'exc_type', 'exc_args', 'frames')
+
+    def __init__(self, relation: str, level: int, position: Tuple[int, int], exc: BaseException, frames: List[LinkedFrame]):
+        self.relation = relation
+        self.level = level  # how many ExceptionGroups deep
+        self.position = position  # (1-based index, count) within the ExceptionGroup, for GROUP
+        self.exc_type = exc.__class__.__qualname__
+        self.exc_args = ExcHandler.fmt_args(exc.args)
+        self.frames = frames
+
+
+def _links(exc: BaseException) -> List[Tuple[str, Tuple[int, int], BaseException]]:
+    """The exceptions directly linked to `exc`, in the order the traceback module considers them."""
+    links = []
+    if exc.__cause__ is not None:
+        links.append((CAUSE, (0, 0), exc.__cause__))
+    elif exc.__context__ is not None and not exc.__suppress_context__:
+        links.append((CONTEXT, (0, 0), exc.__context__))
+    if _BaseExceptionGroup is not None and isinstance(exc, _BaseExceptionGroup):
+        count = len(exc.exceptions)
+        links.extend((GROUP, (i, count), sub_exc) for i, sub_exc in enumerate(exc.exceptions, start=1))
+    return links
+
+
+@functools.lru_cache(maxsize=256)
+def _stand_in_exc_type(qualname: str, module: str) -> type:
+    """An Exception subclass named like an archived exception's type, whose renderers only look at the name."""
+    return type(qualname.rpartition('.')[2], (Exception,), {'__qualname__': qualname, '__module__': module})
+
+
+def _utf8_len(string: str) -> int:
+    return len(string) if string.isascii() else len(string.encode('utf-8', 'replace'))
+
+
+def _truncate_bytes(string: str, max_bytes: int) -> str:
+    if len(string) * 4 <= max_bytes:
+        return string  # can't exceed budget even if every char is 4 bytes
+    encoded = string.encode('utf-8', 'replace')
+    if len(encoded) <= max_bytes:
+        return string
+    return encoded[:max_bytes].decode('utf-8', 'ignore') + f'... ({len(encoded) - max_bytes} more bytes)'
+
 
 class ExcHandler:
-    def __init__(self, exc: Exception = None, *, capture_locals=True, formatter=repr):
+    def __init__(self, exc: Exception = None, *,
+                 capture_locals=True,
+                 formatter=bounded_repr,
+                 snapshot=False,
+                 max_value_bytes: int = SNAPSHOT_VALUE_BYTES,
+                 max_frame_bytes: int = SNAPSHOT_FRAME_BYTES):
         """
         Provides additional data about the exception with extra functionality, including frame locals. Example:
         ::
             except Exception as e:
                 print(ExcHandler(e).full())
+
+        Frames (and their locals) are extracted lazily, the first time `last`, `summary()` or `full()` need them.
+        `full()` also renders the linked exceptions (causes, contexts and ExceptionGroup members, see `linked`);
+        a frame they share with an exception rendered before them is only referenced.
+        With the flight recorder on, the handler takes the thread's unlogged Loggr records, and `full()` shows them (see `flight`).
+
+        :param formatter: renders each local (and its type). `bounded_repr` by default, so huge locals don't blow up the report.
+        :param bool snapshot: Extract frames right away and render locals into size-capped `LocalSnapshot`s,
+         then drop all frame and traceback references (`self.exc` becomes a traceback-less copy).
+         Use when the handler outlives the `except` block (kept in a list, queue, log record etc).
+        :param int max_value_bytes: snapshot=True: each rendered local is truncated to this many bytes.
+        :param int max_frame_bytes: snapshot=True: locals of a frame beyond this many bytes (total) are omitted.
                 """
         # TODO: 1. support for *args then print arg names and values like in 'printdbg'
-        #  2. handle 'raise ... from e' better. 'Responsible code: raise ...' isnt interesting (use e.__cause__)
+        #  2. 'Responsible code: raise ... from e' isnt interesting, could point at the cause's last frame
         #  3. if exception raised deliberately ("raise ValueError(...)"), get earlier frame
         self.exc = None  # declare first thing in case anything fails
         self._formatter = formatter
+        self._capture_locals = capture_locals
+        self._max_value_bytes = max_value_bytes
+        self._max_frame_bytes = max_frame_bytes
+        self._tb = None
+        self._stack_frames = []
+        self._frame_summaries = None
+        self._linked = None
+        self._linked_omitted = 0
+        self._fingerprint = None
+        self._origin = None
+        self._flight_records = []
+        self._flight_thread = None
+        self._flight = None
         try:
 
             if exc:
-                tb = sys.exc_info()[2]  # only tb because caller passed exc
+                tb = sys.exc_info()[2] or exc.__traceback__  # only tb because caller passed exc
                 self.exc = exc
             else:
                 _, exc, tb = sys.exc_info()  # exc and tb
                 self.exc = exc
             self.excArgs = ""
-            self.frame_summaries: FrameSummaries = []
 
             if not tb and not exc:
+                self._frame_summaries = []
                 return
 
-            tb_frame_summaries = ExcHandler._extract_tb(tb, capture_locals)
-            stack: traceback.StackSummary = traceback.extract_stack()[:-1]  # leave out current frame
-            self.frame_summaries = ExcHandler._combine_traceback_and_stack(stack, tb_frame_summaries)
+            # Frame extraction is deferred until 'last', 'summary()' or 'full()' need it.
+            # Only the raw (frame, lineno) pairs of the current stack are kept here,
+            # because by then the stack will have moved on.
+            self._tb = tb
+            self._stack_frames = list(traceback.walk_stack(sys._getframe(1)))
             self.excArgs = ExcHandler.fmt_args(self.exc.args)
+            if recorder.capacity:
+                # the unlogged Loggr records that led here; formatted only by full()
+                self._flight_records = recorder.drain()
+                self._flight_thread = threading.current_thread().name
+            if snapshot:
+                self._take_snapshot()
 
         except Exception as init_exc:
             self._handle_self_failure(init_exc)
 
+    @property
+    def frame_summaries(self) -> FrameSummaries:
+        if self._frame_summaries is None:
+            self._frame_summaries = []  # in case extraction fails and 'last' is accessed
+            try:
+                self._frame_summaries = self._extract_frame_summaries()
+            except Exception as extract_exc:
+                self._handle_self_failure(extract_exc, orig_frame=self._stack_frames[0][0] if self._stack_frames else None)
+        return self._frame_summaries
+
+    @frame_summaries.setter
+    def frame_summaries(self, frame_summaries: FrameSummaries):
+        self._frame_summaries = frame_summaries
+
+    @property
+    def linked(self) -> List[LinkedException]:
+        """Every exception linked to this one, depth first: the cause (or context) chain, and ExceptionGroup members
+        (with their own chains). Extracted lazily, at most MAX_LINKED of them."""
+        if self._linked is None:
+            self._linked = []
+            try:
+                self._linked = self._extract_linked()
+            except Exception as extract_exc:
+                print(styles.brightyellow(f'ExcHandler failed extracting linked exceptions: '
+                                          f'{extract_exc.__class__.__qualname__}: {extract_exc}'))
+        return self._linked
+
+    def _extract_linked(self) -> List[LinkedException]:
+        if self.exc is None:
+            return []
+        # frames rendered by the top exception: (frame id, lineno), and frame ids whose locals are rendered
+        seen: Set[Tuple[int, int]] = {(id(frame), lineno) for frame, lineno in self._stack_frames}
+        seen_locals: Set[int] = set()
+        tb = self._tb
+        while tb is not None:
+            seen.add((id(tb.tb_frame), tb.tb_lineno))
+            if self._capture_locals:
+                seen_locals.add(id(tb.tb_frame))
+            tb = tb.tb_next
+        linked = []
+        visited = {id(self.exc)}  # __context__ can be cyclic
+        pending = [(link, 0) for link in reversed(_links(self.exc))]
+        while pending:
+            (relation, position, exc), level = pending.pop()
+            if id(exc) in visited:
+                continue
+            visited.add(id(exc))
+            if len(linked) == MAX_LINKED:
+                self._linked_omitted += 1
+            else:
+                frames = self._extract_linked_frames(exc.__traceback__, seen, seen_locals)
+                linked.append(LinkedException(relation, level, position, exc, frames))
+            sub_level = level + 1 if _BaseExceptionGroup is not None and isinstance(exc, _BaseExceptionGroup) else level
+            for link in reversed(_links(exc)):
+                pending.append((link, sub_level if link[0] == GROUP else level))
+        return linked
+
+    def _extract_linked_frames(self, tb, seen: Set[Tuple[int, int]], seen_locals: Set[int]) -> List[LinkedFrame]:
+        """User frames of `tb`. Frames in `seen` aren't extracted again (no source line lookup, no locals)."""
+        frames = []
+        is_library = classifier.is_library
+        while tb is not None:
+            frame, lineno = tb.tb_frame, tb.tb_lineno
+            tb = tb.tb_next
+            code = frame.f_code
+            if is_library(code.co_filename):
+                continue
+            fs = traceback.FrameSummary(code.co_filename, lineno, code.co_name, lookup_line=False)
+            key = (id(frame), lineno)
+            if key in seen:
+                frames.append(LinkedFrame(fs, repeated=True))
+                continue
+            seen.add(key)
+            if not self._capture_locals:
+                frames.append(LinkedFrame(fs))
+            elif id(frame) in seen_locals:
+                frames.append(LinkedFrame(fs, locals_above=True))
+            else:
+                seen_locals.add(id(frame))
+                fs.locals = frame.f_locals
+                frames.append(LinkedFrame(fs))
+        return frames
+
+    def _extract_frame_summaries(self) -> FrameSummaries:
+        tb_frame_summaries = ExcHandler._extract_tb(self._tb, self._capture_locals)
+        stack = traceback.StackSummary.extract(reversed(self._stack_frames))
+        return ExcHandler._combine_traceback_and_stack(stack, tb_frame_summaries)
+
+    def _take_snapshot(self):
+        """Renders locals of all frames within budget, then releases frames, traceback and the original exception."""
+        for _, fs in self.frame_summaries:
+            if fs.locals is not None:
+                fs.locals = self._snapshot_locals(fs.locals)
+        for linked in self.linked:
+            for linked_frame in linked.frames:
+                fs = linked_frame.summary
+                if not linked_frame.repeated:
+                    fs.line  # looks up the source line now, like the top exception's frames
+                if fs.locals is not None:
+                    fs.locals = self._snapshot_locals(fs.locals)
+        self.fingerprint  # needs the traceback
+        self.origin
+        self.flight
+        self._tb = None
+        self._stack_frames = []
+        self.exc = ExcHandler._detach_traceback(self.exc)
+
+    def _snapshot_locals(self, lokals: dict) -> dict:
+        snapshot = dict()
+        frame_bytes = 0
+        omitted = 0
+        for name, val in lokals.items():
+            if frame_bytes >= self._max_frame_bytes:
+                omitted += 1
+                continue
+            rendered = self._render_local(name, val)
+            if rendered is None:
+                continue
+            val, typ = rendered
+            val = _truncate_bytes(val, self._max_value_bytes)
+            frame_bytes += _utf8_len(val) + _utf8_len(typ)
+            snapshot[name] = LocalSnapshot(val, typ)
+        if omitted:
+            snapshot['...'] = LocalSnapshot(f'{omitted} more locals omitted (max_frame_bytes={self._max_frame_bytes})', '')
+        return snapshot
+
+    @staticmethod
+    def _detach_traceback(exc):
+        """Returns a copy of `exc` without __traceback__, __cause__ and __context__ (which reference frames).
+        If `exc` can't be copied, a stand-in exception named like its type, with its args (or its str)."""
+        if exc is None:
+            return None
+        try:
+            detached = copy.copy(exc)
+        except Exception:
+            stand_in_type = _stand_in_exc_type(exc.__class__.__qualname__, exc.__class__.__module__)
+            try:
+                detached = stand_in_type(*exc.args)
+            except Exception:
+                detached = stand_in_type(ExcHandler.fmt_args((exc,)))
+        detached.__traceback__ = None
+        detached.__cause__ = None
+        detached.__context__ = None
+        return detached
+
     @staticmethod
     def _handle_bad_call_context():
         warning = '\n'.join(["ExcHandler couldn't find any Exception along the trace",
@@ -52,13 +328,18 @@ class ExcHandler:
         print(warning)
         return ""
 
-    def _handle_self_failure(self, init_exc):
+    def _handle_self_failure(self, init_exc, orig_frame=None):
         # TODO: this only partially works, needs some work
-        tb = sys.exc_info()[2]
-        stack: traceback.StackSummary = traceback.extract_stack()[:-2]  # leave out this frame and __init__ frame
-        innerframes = inspect.getinnerframes(tb)
-        outerframes = inspect.getouterframes(innerframes[0].frame)[1:]  # outerframes are in reverse order
-        orig_frame = outerframes[0].frame
+        if orig_frame is None:
+            # called from __init__
+            tb = sys.exc_info()[2]
+            stack: traceback.StackSummary = traceback.extract_stack()[:-2]  # leave out this frame and __init__ frame
+            innerframes = inspect.getinnerframes(tb)
+            outerframes = inspect.getouterframes(innerframes[0].frame)[1:]  # outerframes are in reverse order
+            orig_frame = outerframes[0].frame
+        else:
+            # called lazily, when extracting frame summaries
+            stack = traceback.extract_stack(orig_frame)
         self.frame_summaries = ExcHandler._remove_nonlib_frames(stack)
         self.last.locals = orig_frame.f_locals
 
@@ -90,7 +371,7 @@ class ExcHandler:
                     continue
 
                 if f_idx < tb_steps_taken:
-                    print(colors.brightyellow(f'REALLY WIERD, f_idx ({f_idx}) < tb_steps_taken ({tb_steps_taken})'))
+                    print(styles.brightyellow(f'REALLY WIERD, f_idx ({f_idx}) < tb_steps_taken ({tb_steps_taken})'))
                     continue
 
                 if f_idx > tb_steps_taken:
@@ -120,13 +401,9 @@ class ExcHandler:
 
     @staticmethod
     def _remove_nonlib_frames(stack: traceback.StackSummary) -> FrameSummaries:
-        frame_summaries: FrameSummaries = []
-        for i, frame in enumerate(stack):
-            irrelevant = 'site-packages' in frame.filename or 'dist-packages' in frame.filename or 'python3' in frame.filename or 'JetBrains' in frame.filename
-            if irrelevant:
-                continue
-            frame_summaries.append([i, frame])
-        return frame_summaries
+        """Keeps only user frames, as classified (and cached per filename) by `igit_debug.frames.classifier`."""
+        is_library = classifier.is_library
+        return [[i, frame] for i, frame in enumerate(stack) if not is_library(frame.filename)]
 
     @staticmethod
     def _get_frames_overlap_index(stack_f_summaries: FrameSummaries, tb_f_summaries: FrameSummaries):
@@ -145,28 +422,29 @@ class ExcHandler:
             excArgs.append(arg)
         return ", ".join(excArgs)
 
-    def _format_locals(self, lokals: dict) -> str:
-        formatted = ""
-        for name, val in lokals.items():
-            if name.startswith('__') or isinstance(val, ModuleType):
-                continue
-            if inspect.isfunction(val):
-                print(colors.brightblack(f'skipped function: {name}'))
+    def _render_local(self, name: str, val) -> Optional[Tuple[str, str]]:
+        """Returns the formatted value and type of a local, or None if it shouldn't be displayed."""
+        if isinstance(val, LocalSnapshot):
+            return val.val, val.typ
+        if name.startswith('__') or isinstance(val, ModuleType):
+            return None
+        if inspect.isfunction(val):
+            return None
+
+        typ = self._formatter(type(val))
+        val = self._formatter(val)
+
+        if val.startswith('typing'):
+            return None
+        return val, typ
+
+    def _rendered_locals(self, lokals: dict) -> Iterator[Tuple[str, str, str]]:
+        """(name, rendered value, rendered type) of the locals that should be displayed."""
+        for name, val in list(lokals.items()):  # may be rendered on another thread (see igit_debug.background)
+            rendered = self._render_local(name, val)
+            if rendered is None:
                 continue
-
-            typ = self._formatter(type(val))
-            val = self._formatter(val)
-
-            if val.startswith('typing'):
-                continue
-            if '\n' in val:
-                linebreak = '\n\n'  # queries etc
-                quote = '"""'
-            else:
-                linebreak = '\n'
-                quote = ''
-            formatted += f'\t{colors.white(name)}: {quote}{val}{quote} {colors.dark(typ)}{linebreak}'
-        return formatted
+            yield name, *rendered
 
     @property
     def last(self) -> traceback.FrameSummary:
@@ -177,9 +455,95 @@ class ExcHandler:
             fs = traceback.FrameSummary(__name__, -1, 'ExcHandler.last()')
             return fs
 
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """See `igit_debug.fingerprint.fingerprint()`. None if there's no exception."""
+        if self._fingerprint is None and self.exc is not None:
+            self._fingerprint = fingerprint(self.exc, self._tb)
+        return self._fingerprint
+
+    @property
+    def flight(self) -> str:
+        """The flight recorder's records of the thread that constructed this handler, formatted (empty if there are none).
+        See `igit_debug.flight_recorder`."""
+        if self._flight is None:
+            self._flight = format_records(self._flight_records, self._flight_thread)
+            self._flight_records = []
+        return self._flight
+
+    @property
+    def origin(self) -> Optional[str]:
+        """The module (__name__) of the innermost user frame of the traceback. None if there's none."""
+        if self._origin is None and self._tb is not None:
+            tb = self._tb
+            while tb is not None:
+                frame = tb.tb_frame
+                if not classifier.is_library(frame.f_code.co_filename):
+                    self._origin = frame.f_globals.get('__name__')
+                tb = tb.tb_next
+        return self._origin
+
+    def record(self) -> dict:
+        """Everything the renderers need, as plain (JSON / marshal serializable) data, locals rendered like snapshot=True.
+        `ExcHandler.from_record()` restores a handler that renders the same. Used by `igit_debug.archive`."""
+        frame_record = lambda fs: [fs.filename, fs.lineno, fs.name, fs.line,
+                                   None if fs.locals is None else
+                                   {name: [snap.val, snap.typ] for name, snap in self._snapshot_locals(fs.locals).items()}]
+        exc_type = type(self.exc)
+        return {'type':        exc_type.__qualname__,
+                'type_module': exc_type.__module__,
+                'args':        self.excArgs,
+                'fingerprint': self.fingerprint,
+                'origin':      self.origin,
+                'frames':      [[i, *frame_record(fs)] for i, fs in self.frame_summaries],
+                'linked':      [[linked.relation, linked.level, *linked.position, linked.exc_type, linked.exc_args,
+                                 [[*(frame_record(lf.summary) if not lf.repeated else  # no line, no locals
+                                     [lf.summary.filename, lf.summary.lineno, lf.summary.name, None, None]),
+                                   lf.repeated, lf.locals_above] for lf in linked.frames]]
+                                for linked in self.linked],
+                'omitted':     self._linked_omitted,
+                'flight':      self.flight}
+
+    @classmethod
+    def from_record(cls, record: dict) -> 'ExcHandler':
+        """A handler restored from `record()`. `exc` is a stand-in of the original type (same qualname and module),
+        with the formatted args as its only arg."""
+
+        def frame_summary(filename, lineno, name, line, lokals) -> traceback.FrameSummary:
+            fs = traceback.FrameSummary(filename, lineno, name, lookup_line=False, line=line)
+            if lokals is not None:
+                fs.locals = {local_name: LocalSnapshot(val, typ) for local_name, (val, typ) in lokals.items()}
+            return fs
+
+        handler = cls.__new__(cls)  # not __init__, which would look at sys.exc_info()
+        handler.exc = _stand_in_exc_type(record['type'], record['type_module'])(record['args'])
+        handler.excArgs = record['args']
+        handler._formatter = bounded_repr
+        handler._capture_locals = True
+        handler._max_value_bytes = SNAPSHOT_VALUE_BYTES
+        handler._max_frame_bytes = SNAPSHOT_FRAME_BYTES
+        handler._tb = None
+        handler._stack_frames = []
+        handler._fingerprint = record['fingerprint']
+        handler._origin = record['origin']
+        handler._frame_summaries = [[i, frame_summary(*frame)] for i, *frame in record['frames']]
+        handler._linked = []
+        for relation, level, index, count, exc_type, exc_args, frames in record['linked']:
+            linked = LinkedException.__new__(LinkedException)
+            linked.relation, linked.level, linked.position = relation, level, (index, count)
+            linked.exc_type, linked.exc_args = exc_type, exc_args
+            linked.frames = [LinkedFrame(frame_summary(*frame), repeated=repeated, locals_above=locals_above)
+                             for *frame, repeated, locals_above in frames]
+            handler._linked.append(linked)
+        handler._linked_omitted = record['omitted']
+        handler._flight_records = []
+        handler._flight_thread = None
+        handler._flight = record.get('flight', '')
+        return handler
+
     @property
     def excType(self) -> str:
-        return colors.brightwhite(self.exc.__class__.__qualname__)
+        return styles.brightwhite(self.exc.__class__.__qualname__)
 
     def shorter(self, *extra) -> str:
         """Returns 1 very short line: just pretty exception type and formatted exception args if exist (plus any `extra` lines).
@@ -204,7 +568,7 @@ class ExcHandler:
         """
         if not self.exc:
             return ExcHandler._handle_bad_call_context()
-        string = f'{self.excType}: {self.excArgs} | File "{self.last.filename}", line {self.last.lineno} in {colors.brightwhite(self.last.name)}()'
+        string = f'{self.excType}: {self.excArgs} | File "{self.last.filename}", line {self.last.lineno} in {styles.brightwhite(self.last.name)}()'
         if extra:
             string += f' | ' + ', '.join(map(str, extra))
         return string
@@ -217,16 +581,9 @@ class ExcHandler:
         """
         if not self.exc:
             return ExcHandler._handle_bad_call_context()
-        string = '\n'.join([
-            f'{self.excType}, File "{self.last.filename}", line {self.last.lineno} in {colors.brightwhite(self.last.name)}()',
-            colors.white(f'Exception args:'),
-            f'\t{self.excArgs}',
-            colors.white(f'Responsible code:'),
-            f'\t{self.last.line}',
-            *map(str, extra)
-        ])
-
-        return string
+        parts = []
+        AnsiRenderer(parts.append).summary(self.exc.__class__.__qualname__, self.excArgs, self.last, extra)
+        return ''.join(parts)
 
     def full(self, *extra, limit: int = None) -> str:
         """
@@ -235,23 +592,62 @@ class ExcHandler:
         :param extra: any extra data / information to be included at the end of the summary
         :param int limit: 0-based, from recent to deepest (limit=0 means only first frame)
         """
-        import os
-        try:
-            termwidth, _ = os.get_terminal_size()
-            print(f'termwidth: {termwidth}')
-            if not termwidth:
-                termwidth = 80
-        except Exception as e:
-            termwidth = 80
+        return self.render(*extra, limit=limit)
+
+    def render(self, *extra, renderer: Union[str, Type[Renderer]] = 'ansi', limit: int = None, file=None, **renderer_kwargs) -> Optional[str]:
+        """
+        Renders the `full()` report with `renderer`, in one pass: 'ansi' (what `full()` returns), 'plain', 'html', 'json',
+        or any `igit_debug.renderers.Renderer` subclass.
+        ::
+            handler.render(renderer='html', file=report_file)
+
+        :param extra: any extra data / information to be included at the end of the summary
+        :param int limit: 0-based, from recent to deepest (limit=0 means only first frame)
+        :param file: write the report to this file object as it's rendered, and return None, instead of returning it.
+        :param renderer_kwargs: passed to the renderer (e.g. width=120 for text renderers, indent=2 for 'json').
+        """
         if not self.exc:
             return ExcHandler._handle_bad_call_context()
-        description = self.summary(*extra)
+        parts = None
+        if file is None:
+            parts = []
+            write = parts.append
+        else:
+            write = file.write
+        renderer = get_renderer(renderer)(write, **renderer_kwargs)
+        renderer.begin()
+        renderer.summary(self.exc.__class__.__qualname__, self.excArgs, self.last, extra)
         honor_limit = limit is not None
         for i, fs in self.frame_summaries:
             if honor_limit and i > limit:
                 break
             # from recent to deepest
-            description += f'\nFile "{fs.filename}", line {fs.lineno} in {colors.brightwhite(fs.name + "()")}\n\t{fs.line}'
+            renderer.frame(fs)
             if fs.locals is not None:
-                description += f'\n{colors.white("Locals")}:\n{self._format_locals(fs.locals)}'
-        return f'\n{"-" * termwidth}\n\n{description}\n{"-" * termwidth}\n'
+                renderer.locals(self._rendered_locals(fs.locals))
+        for linked in self.linked:
+            self._render_linked(linked, renderer)
+        if self._linked_omitted:
+            renderer.note(f'... {self._linked_omitted} more linked exceptions (MAX_LINKED={MAX_LINKED})')
+        if self.flight:
+            renderer.note(self.flight)
+        renderer.end()
+        return None if parts is None else ''.join(parts)
+
+    def _render_linked(self, linked: LinkedException, renderer: Renderer):
+        if linked.relation == CAUSE:
+            label = 'Caused by'
+        elif linked.relation == CONTEXT:
+            label = 'Raised while handling'
+        else:
+            label = f'Sub-exception {linked.position[0]}/{linked.position[1]}'
+        renderer.linked(label, linked.level, linked.exc_type, linked.exc_args)
+        for linked_frame in linked.frames:
+            fs = linked_frame.summary
+            renderer.frame(fs, repeated=linked_frame.repeated)
+            if linked_frame.repeated:
+                continue
+            if linked_frame.locals_above:
+                renderer.locals((), above=True)
+            elif fs.locals is not None:
+                renderer.locals(self._rendered_locals(fs.locals))
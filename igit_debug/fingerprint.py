@@ -0,0 +1,131 @@
+import collections
+import hashlib
+import re
+import threading
+import time
+from typing import List, Optional
+
+# "0x7f3a5c2b1e80" → "<addr>", "1234" → "<n>"
+ADDRESS_RE = re.compile(r'0x[0-9a-fA-F]+')
+NUMBER_RE = re.compile(r'\d+')
+
+
+def normalize_args(exc_args) -> str:
+    """Stringifies exception args and replaces the parts that vary between occurrences (numbers, memory addresses)."""
+    normalized = []
+    for arg in exc_args:
+        try:
+            arg = str(arg)[:200]
+        except Exception:
+            arg = type(arg).__qualname__
+        arg = ADDRESS_RE.sub('<addr>', arg)
+        arg = NUMBER_RE.sub('<n>', arg)
+        normalized.append(arg)
+    return ', '.join(normalized)
+
+
+def fingerprint(exc: BaseException, tb=None) -> str:
+    """A short hex digest identifying "the same" exception: same type, same normalized args,
+    raised through the same chain of code locations (file, function, line).
+    Walks the traceback objects only; no source lines are read."""
+    if tb is None:
+        tb = exc.__traceback__
+    typ = type(exc)
+    parts = [f'{typ.__module__}.{typ.__qualname__}', normalize_args(exc.args)]
+    while tb is not None:
+        code = tb.tb_frame.f_code
+        parts.append(f'{code.co_filename}:{code.co_name}:{tb.tb_lineno}')
+        tb = tb.tb_next
+    return hashlib.blake2b('\n'.join(parts).encode('utf-8', 'replace'), digest_size=8).hexdigest()
+
+
+class Occurrence:
+    __slots__ = ('fingerprint', 'exc_type', 'description', 'count', 'suppressed',
+                 'first_seen', 'last_seen', 'window_start', 'window_count', 'unreported')
+
+    def __init__(self, fp: str, exc: BaseException, now: float):
+        self.fingerprint = fp
+        self.exc_type = type(exc).__qualname__
+        self.description = normalize_args(exc.args)
+        self.count = 0
+        self.suppressed = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.window_start = now
+        self.window_count = 0
+        self.unreported = 0  # suppressed since the last full report
+
+
+class ExcRegistry:
+    def __init__(self, *, max_reports: int = 5, window: float = 60.0, max_fingerprints: int = 10_000):
+        """Counts exceptions by `fingerprint`, and decides which occurrences deserve a full report:
+        only the first `max_reports` occurrences of every fingerprint in each `window` seconds.
+        Keeps at most `max_fingerprints` fingerprints; the least recently seen one is forgotten to make room
+        (its counts are dropped, and its next occurrence is reported as new).
+        Thread safe. A process-wide instance is available as `igit_debug.fingerprint.registry`.
+        ::
+            if registry.should_report(e):
+                print(ExcHandler(e).full())
+        """
+        self.max_reports = max_reports
+        self.window = window
+        self.max_fingerprints = max_fingerprints
+        self.enabled = True
+        self._occurrences: 'collections.OrderedDict[str, Occurrence]' = collections.OrderedDict()  # least recently seen first
+        self._lock = threading.Lock()
+
+    def record(self, exc: BaseException, tb=None) -> Optional[Occurrence]:
+        """Counts `exc` and returns its `Occurrence` if it should be fully reported, None if it should be suppressed."""
+        fp = fingerprint(exc, tb)
+        now = time.monotonic()
+        with self._lock:
+            occurrence = self._occurrences.get(fp)
+            if occurrence is None:
+                occurrence = self._occurrences[fp] = Occurrence(fp, exc, now)
+                if len(self._occurrences) > self.max_fingerprints:
+                    self._occurrences.popitem(last=False)
+            else:
+                self._occurrences.move_to_end(fp)
+            occurrence.count += 1
+            occurrence.last_seen = now
+            if now - occurrence.window_start >= self.window:
+                occurrence.window_start = now
+                occurrence.window_count = 0
+            occurrence.window_count += 1
+            if not self.enabled or occurrence.window_count <= self.max_reports:
+                return occurrence
+            occurrence.suppressed += 1
+            occurrence.unreported += 1
+            return None
+
+    def should_report(self, exc: BaseException, tb=None) -> bool:
+        return self.record(exc, tb) is not None
+
+    def suppressed_note(self, occurrence: Occurrence) -> str:
+        """Returns e.g. "(+42 identical suppressed since last report)" and resets the counter, or '' if nothing was suppressed."""
+        with self._lock:  # record() counts on other threads
+            unreported, occurrence.unreported = occurrence.unreported, 0
+        if not unreported:
+            return ''
+        return f'(+{unreported} identical suppressed since last report)'
+
+    def top(self, n: int = 10) -> List[Occurrence]:
+        """The `n` most frequent occurrences, most frequent first."""
+        with self._lock:
+            occurrences = list(self._occurrences.values())
+        return sorted(occurrences, key=lambda o: o.count, reverse=True)[:n]
+
+    def table(self, n: int = 10) -> str:
+        """The `n` most frequent occurrences as a text table."""
+        rows = [('count', 'suppressed', 'fingerprint', 'exception')]
+        for o in self.top(n):
+            rows.append((str(o.count), str(o.suppressed), o.fingerprint, f'{o.exc_type}: {o.description}'[:120]))
+        widths = [max(len(row[i]) for row in rows) for i in range(3)]
+        return '\n'.join(f'{row[0]:>{widths[0]}}  {row[1]:>{widths[1]}}  {row[2]:<{widths[2]}}  {row[3]}' for row in rows)
+
+    def reset(self):
+        with self._lock:
+            self._occurrences.clear()
+
+
+registry = ExcRegistry()
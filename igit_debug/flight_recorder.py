@@ -0,0 +1,133 @@
+import collections
+import sys
+import threading
+import time
+from typing import Deque, List, Optional, Tuple
+
+from igit_debug.formatting import bounded_repr
+
+# (time, level, module, code, lineno, args, types, lazy)
+FlightRecord = Tuple[float, int, Optional[str], object, int, tuple, bool, bool]
+
+DEFAULT_CAPACITY = 256
+# a recorded arg (other than a number, None or a lazy arg's callable) is kept as at most this many chars
+MAX_ARG_CHARS = 200
+MAX_INT_BITS = 1024
+_SCALARS = (float, bool, complex, type(None))
+
+
+class CapturedArg:
+    """What the flight recorder keeps of an arg that isn't a number, None or a str: its bounded repr and type name.
+    Formatted as-is by `igit_debug.loggr.fmt_arg`."""
+    __slots__ = ('text', 'type_name')
+
+    def __init__(self, text: str, type_name: str):
+        self.text = text
+        self.type_name = type_name
+
+    def __repr__(self):
+        return self.text
+
+
+def capture(arg):
+    """A bounded, immutable stand-in of `arg`, holding no reference to it."""
+    typ = type(arg)
+    if typ in _SCALARS or (typ is int and arg.bit_length() <= MAX_INT_BITS):
+        return arg
+    if typ is str:
+        if len(arg) <= MAX_ARG_CHARS:
+            return arg
+        return f'{arg[:MAX_ARG_CHARS]}...(+{len(arg) - MAX_ARG_CHARS} chars)'
+    if typ is int:
+        return CapturedArg(f'<int of {arg.bit_length()} bits>', 'int')
+    try:
+        text = bounded_repr(arg, max_chars=MAX_ARG_CHARS, max_items=10, max_depth=1)  # nested collections are elided
+    except Exception as e:
+        text = f'(failed formatting: {e.__class__.__qualname__}: {e})'
+    return CapturedArg(text[:MAX_ARG_CHARS + 40], typ.__qualname__)  # a custom repr may not be bounded
+
+
+class FlightRecorder:
+    def __init__(self, capacity: int = 0, level: int = 0):
+        """
+        Keeps the last `capacity` Loggr records of every thread that were below the Loggr's level (i.e. not logged),
+        and formats them only when they're needed: when the thread logs an exception (`Loggr.exception()`) or
+        constructs an ExcHandler, whose `full()` shows them. Disabled (capacity=0) until `use_flight_recorder()`:
+        ::
+            use_flight_recorder(capacity=256)  # from igit_debug.loggr
+            logger = Loggr(__name__, level='INFO')
+            logger.debug('fetched rows:', rows)  # not logged, only recorded
+            ...
+            except Exception:
+                logger.exception('sync failed')  # logged along with the debug records that led to it
+
+        Recording a call costs a frame lookup, capturing its args and a deque append. Args are captured with `capture()`:
+        numbers, None and short strs as they are, anything else as its repr, bounded to MAX_ARG_CHARS chars
+        (so they show their values at the time of the call, and recorded objects aren't kept alive).
+        Lazy args (lazy=True) are the exception: calling them is what lazy avoids, so their callables are kept until dumped.
+        Memory is bounded by `capacity` records per live thread, each holding about MAX_ARG_CHARS chars per arg;
+        a thread's records are freed when it exits.
+        """
+        self.capacity = capacity
+        self.level = level
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def configure(self, capacity: int, level: int):
+        """Takes effect for every thread. Existing records are dropped."""
+        if capacity < 0:
+            raise ValueError(f"capacity must not be negative, got {capacity!r}")
+        self.capacity = capacity
+        self.level = level
+        self._local = threading.local()
+
+    def record(self, level: int, args: tuple, types=False, lazy=False, *, depth: int = 1):
+        """Records a call of this thread. `depth`: how many frames above the caller is the logging call site."""
+        buffer: Optional[Deque[FlightRecord]] = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = collections.deque(maxlen=self.capacity)
+        frame = sys._getframe(depth + 1)
+        if lazy:
+            args = tuple(arg if callable(arg) else capture(arg) for arg in args)
+        else:
+            args = tuple(map(capture, args))
+        buffer.append((time.time(), level, frame.f_globals.get('__name__'), frame.f_code, frame.f_lineno,
+                       args, types, lazy))
+
+    def drain(self) -> List[FlightRecord]:
+        """Removes and returns this thread's records, oldest first."""
+        buffer = getattr(self._local, 'buffer', None)
+        if not buffer:
+            return []
+        records = list(buffer)
+        buffer.clear()
+        return records
+
+    def dump(self) -> str:
+        """Drains and formats this thread's records. Empty if there are none."""
+        return format_records(self.drain(), threading.current_thread().name)
+
+
+def format_records(records: List[FlightRecord], thread_name: str) -> str:
+    """One line per record, like Loggr's FORMAT_STRING (plus the level), without colors."""
+    if not records:
+        return ''
+    from logbook import get_level_name
+    from igit_debug._loggr import fmt_args
+    lines = [f'flight recorder: last {len(records)} unlogged records of {thread_name}:']
+    for when, level, module, code, lineno, args, types, lazy in records:
+        try:
+            if lazy:
+                args = [capture(arg()) if callable(arg) else arg for arg in args]
+            message = fmt_args(args, types=types, colorize=False) or ''
+        except Exception as e:
+            message = f'(failed formatting: {e.__class__.__qualname__}: {e})'
+        lines.append(f'{time.strftime("%T", time.localtime(when))}.{int(when % 1 * 1_000_000):06d} | {get_level_name(level)} | '
+                     f'{module}.{code.co_name}():{lineno} | {message}')
+    return '\n'.join(lines)
+
+
+recorder = FlightRecorder()
@@ -1,8 +1,12 @@
+import array
+import collections
 import re
+import weakref
+from collections.abc import Mapping, Sequence, Set
 from pprint import pformat as prettyformat
+from typing import Any, Callable, Dict, Iterator, Optional
 
-from more_termcolor import colors
-
+from igit_debug import styles
 from igit_debug.util import safeiter
 
 # "<class 'int'>" → "int"
@@ -10,15 +14,224 @@ OBJECT_RE = re.compile(r'<(?:[\w\d]+\.)*([\w\d]+) object at (0x[\w\d]{12})>')
 TYPE_RE = re.compile(r'<\w+ [\'"]([^\"\']+)')
 
 
+# type → formatter. Used as-is (no pprint, no recursion) for instances of the type and its subclasses
+_formatters: Dict[type, Callable[[Any], str]] = {
+    int:        str,
+    float:      str,
+    bool:       str,
+    type(None): str,
+    complex:    str,
+    }
+_resolved_formatters: 'weakref.WeakKeyDictionary[type, Optional[Callable[[Any], str]]]' = weakref.WeakKeyDictionary()
+_type_names: 'weakref.WeakKeyDictionary[type, str]' = weakref.WeakKeyDictionary()
+_type_suffixes: 'weakref.WeakKeyDictionary[type, str]' = weakref.WeakKeyDictionary()
+
+
+def register_formatter(typ: type, formatter: Callable[[Any], str]):
+    """`pformat(obj)` will return `formatter(obj)` (plus the type if types=True) for instances of `typ` and its subclasses."""
+    _formatters[typ] = formatter
+    _resolved_formatters.clear()
+
+
+def _resolve_formatter(typ: type) -> Optional[Callable[[Any], str]]:
+    try:
+        return _resolved_formatters[typ]
+    except (KeyError, TypeError):
+        pass
+    formatter = next((_formatters[base] for base in typ.__mro__ if base in _formatters), None)
+    try:
+        _resolved_formatters[typ] = formatter
+    except TypeError:
+        pass  # not weak-referencable
+    return formatter
+
+
+def _type_name(typ: type) -> str:
+    """"<class 'int'>" → "int". Cached per type."""
+    try:
+        return _type_names[typ]
+    except (KeyError, TypeError):
+        pass
+    name = TYPE_RE.search(str(typ)).groups()[0]
+    try:
+        _type_names[typ] = name
+    except TypeError:
+        pass  # not weak-referencable
+    return name
+
+
+def _type_suffix(typ: type, colorize=True) -> str:
+    """" (int)", colored. Cached per type."""
+    if not colorize or not styles.enabled:
+        return f' ({_type_name(typ)})'
+    try:
+        return _type_suffixes[typ]
+    except (KeyError, TypeError):
+        pass
+    suffix = f' {styles.dark(f"({_type_name(typ)})")}'
+    try:
+        _type_suffixes[typ] = suffix
+    except TypeError:
+        pass
+    return suffix
+
+
 def _pretty_obj(match) -> str:
     groups = match.groups()
     return f'{groups[0]} ({groups[1]})'
 
 
+def _postprocess(string: str) -> str:
+    """Prettifies "<foo.Bar object at 0x...>" and unescapes escape sequences.
+    Skips each pass when it can't change `string`."""
+    if ' object at 0x' in string:
+        string = re.sub(OBJECT_RE, _pretty_obj, string)
+    if string.isascii() and '\\' not in string:
+        return string
+    return string.encode('utf-8').decode('unicode_escape')
+
+
+# bounded_repr defaults
+MAX_CHARS = 1000
+MAX_ITEMS = 50
+MAX_DEPTH = 4
+
+_CONTAINERS = (list, tuple, set, frozenset, dict)
+# rendered item by item like _CONTAINERS, besides builtin sequences, sets and mappings (see `_is_lazy_iterable`)
+_LAZY_ITERABLES = (collections.deque, array.array)
+# builtin sequences whose repr doesn't grow with their length
+_CONSTANT_REPRS = (range, memoryview)
+
+
+def _elided(count: int, what: str) -> str:
+    return f'...(+{count} {what})'
+
+
+class _Budget:
+    __slots__ = ('max_chars', 'max_items', 'max_depth', 'ids')
+    
+    def __init__(self, max_chars: int, max_items: int, max_depth: int):
+        self.max_chars = max_chars
+        self.max_items = max_items
+        self.max_depth = max_depth
+        self.ids = set()  # containers on the current path, to detect cycles
+
+
+def _iter_items_repr(items: Iterator, total: int, budget: _Budget, depth: int, *, is_dict: bool) -> Iterator[str]:
+    for i, item in enumerate(items):
+        if i:
+            yield ', '
+        if i == budget.max_items:
+            yield _elided(total - i, 'items')
+            return
+        if is_dict:
+            key, val = item
+            yield from _iter_repr(key, budget, depth)
+            yield ': '
+            yield from _iter_repr(val, budget, depth)
+        else:
+            yield from _iter_repr(item, budget, depth)
+
+
+def _is_lazy_iterable(typ: type) -> bool:
+    """Deques, arrays, and builtin sequences, sets and mappings (e.g. dict views, mappingproxy).
+    Other sized iterables are repr'd: iterating them may have side effects (a cursor) or not show their contents (a DataFrame)."""
+    if typ in _LAZY_ITERABLES:
+        return True
+    return (typ.__module__ == 'builtins' and issubclass(typ, (Sequence, Set, Mapping))
+            and not issubclass(typ, (str, bytes, bytearray, *_CONSTANT_REPRS)))
+
+
+def _iter_repr(obj, budget: _Budget, depth: int) -> Iterator[str]:
+    """Yields repr(obj) in fragments, eliding container items and levels beyond the budget."""
+    typ = type(obj)
+    if isinstance(obj, (str, bytes, bytearray)) and len(obj) > budget.max_chars:
+        # the output budget will be exhausted by this one anyway; don't repr all of it
+        yield repr(obj[:budget.max_chars])
+        yield _elided(len(obj) - budget.max_chars, 'bytes' if isinstance(obj, (bytes, bytearray)) else 'chars')
+        return
+    base = next((container for container in _CONTAINERS if isinstance(obj, container)), None)
+    if base is None:
+        # deques, arrays and builtin collections are rendered lazily too, unless they're small
+        if not _is_lazy_iterable(typ):
+            yield repr(obj)
+            return
+        try:
+            size = len(obj)
+        except Exception:
+            yield repr(obj)
+            return
+        if size <= budget.max_items:
+            yield repr(obj)
+            return
+        is_mapping = isinstance(obj, Mapping)
+        if is_mapping:
+            opener, closer = f'{typ.__name__}({{', '})'
+        elif isinstance(obj, array.array):
+            opener, closer = f'array({obj.typecode!r}, [', '])'
+        else:
+            opener, closer = f'{typ.__name__}([', '])'
+    else:
+        size = len(obj)
+        is_mapping = base is dict
+        if typ is not base and typ.__repr__ is not base.__repr__ and size <= budget.max_items:
+            yield repr(obj)
+            return
+        if base is dict:
+            opener, closer = '{', '}'
+        elif base is list:
+            opener, closer = '[', ']'
+        elif base is tuple:
+            opener, closer = '(', ',)' if size == 1 else ')'
+        elif not obj:
+            opener, closer = f'{base.__name__}(', ')'
+        elif base is set:
+            opener, closer = '{', '}'
+        else:
+            opener, closer = 'frozenset({', '})'
+        if typ is not base:
+            # subclass, e.g. OrderedDict or a NamedTuple
+            opener, closer = f'{typ.__name__}({opener}', f'{closer})'
+    if id(obj) in budget.ids:
+        yield f'{opener}...{closer}'
+        return
+    if depth >= budget.max_depth and size:
+        yield f'{opener}{_elided(size, "items")}{closer}'
+        return
+    budget.ids.add(id(obj))
+    try:
+        yield opener
+        items = iter(obj.items()) if is_mapping else iter(obj)
+        yield from _iter_items_repr(items, size, budget, depth + 1, is_dict=is_mapping)
+        yield closer
+    finally:
+        budget.ids.discard(id(obj))
+
+
+def bounded_repr(obj, *, max_chars: int = MAX_CHARS, max_items: int = MAX_ITEMS, max_depth: int = MAX_DEPTH) -> str:
+    """Like `repr(obj)`, but for huge or deeply nested collections (and other sized iterables, e.g. deques), renders lazily
+    and stops when `max_chars` were produced, so the cost is proportional to the output, not to `obj`.
+    Shows at most `max_items` items per container and `max_depth` nested levels. Elisions are marked,
+    e.g. '...(+9999950 items)', '...(+200 chars)', '[...(+3 items)]', '...(truncated at 1000 chars)'.
+    Equals `repr(obj)` for builtin collections within budget."""
+    fragments = []
+    length = 0
+    for fragment in _iter_repr(obj, _Budget(max_chars, max_items, max_depth), 0):
+        length += len(fragment)
+        if length > max_chars:
+            fragments.append(fragment[:max_chars - length])
+            fragments.append(f'...(truncated at {max_chars} chars)')
+            break
+        fragments.append(fragment)
+    return ''.join(fragments)
+
+
 def pformat(obj, *,
             types=False,
             depth=1,
-            stringifier=repr
+            stringifier=repr,
+            max_chars: int = None,
+            colorize=True
             ) -> str:
     """
     :param obj: The object to pretty-print. Can be (almost) anything.
@@ -26,20 +239,27 @@ def pformat(obj, *,
     :param int depth: For recursive collections, how deep should the function apply itself to sub items.
     :param Callable stringifier: function to convert a primitive to string; `repr` by default
     :param bool colorize: whether to use colors in the output string.
+    :param int max_chars: Bounded mode: collections are rendered by `bounded_repr` (lazily, within `max_chars`),
+     and any other value is truncated to `max_chars`.
+    
+    Instances of types with a registered formatter (see `register_formatter`; e.g. int, float, None) skip everything else.
     """
+    typ = type(obj)
+    formatter = _resolve_formatter(typ)
+    if formatter is not None:
+        string = formatter(obj)
+        if types:
+            string += _type_suffix(typ, colorize)
+        return _postprocess(string)
     
     def _type_pformat(_obj: type) -> str:
-        _s = str(_obj)
-        _match = TYPE_RE.search(_s)
-        _groups = _match.groups()
-        return _groups[0]
+        return _type_name(_obj)
     
     def _generic_pformat(_obj, *, _types: bool, _stringifier=str) -> str:
         if not _types:
             _string = _stringifier(_obj)
         else:
-            _type_repr = f"({_type_pformat(type(_obj))})"
-            _string = f'{_stringifier(_obj)} {colors.dark(_type_repr)}'
+            _string = f'{_stringifier(_obj)}{_type_suffix(type(_obj), colorize)}'
         return _string
     
     def _recursive_pformat(_obj, *, _types: bool, _depth: int) -> str:
@@ -48,7 +268,7 @@ def pformat(obj, *,
         
         _formatted_items = []
         for _item in _obj:
-            _formatted_item = pformat(_item, types=_types, depth=_depth, stringifier=str)
+            _formatted_item = pformat(_item, types=_types, depth=_depth, stringifier=str, colorize=colorize)
             _formatted_items.append(_formatted_item)
         
         _formatted_obj = type(_obj)(_formatted_items)
@@ -56,6 +276,9 @@ def pformat(obj, *,
         _string = str(_formatted_obj)
         return _string
     
+    if max_chars is not None:
+        return _bounded_pformat(obj, types=types, stringifier=stringifier, max_chars=max_chars, colorize=colorize)
+    
     if isinstance(obj, dict):
         return prettyformat(obj, depth=depth)
     isstr = isinstance(obj, str)
@@ -88,5 +311,23 @@ def pformat(obj, *,
     
     else:
         string = _generic_pformat(obj, _types=types)
-    string = re.sub(OBJECT_RE, _pretty_obj, string)
-    return string.encode('utf-8').decode('unicode_escape')
+    return _postprocess(string)
+
+
+def _bounded_pformat(obj, *, types: bool, stringifier, max_chars: int, colorize: bool) -> str:
+    if isinstance(obj, _CONTAINERS) or _is_lazy_iterable(type(obj)):
+        string = _postprocess(bounded_repr(obj, max_chars=max_chars))
+    else:
+        elided = ''
+        if isinstance(obj, str) and len(obj) > max_chars:
+            elided = _elided(len(obj) - max_chars, 'chars')
+            obj = obj[:max_chars]
+        string = pformat(obj, stringifier=stringifier)
+        if len(string) > max_chars:
+            # one marker: the chars left out of a long str, or where the rendering was cut
+            string = string[:max_chars] + (elided or f'...(truncated at {max_chars} chars)')
+        else:
+            string += elided
+    if types:
+        string += _type_suffix(type(obj), colorize)
+    return string
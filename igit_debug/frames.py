@@ -0,0 +1,81 @@
+import fnmatch
+import os
+import site
+import sys
+import sysconfig
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+# always library code, wherever the interpreter is: installed packages (even outside of the known paths, e.g. pip --target)
+# and IDE helpers
+DEFAULT_EXCLUDE = ('*/site-packages/*', '*/dist-packages/*', '*JetBrains*')
+
+
+def _normalize(path: str) -> str:
+    return os.path.normcase(os.path.realpath(path)).replace(os.sep, '/')
+
+
+def library_dirs() -> Tuple[str, ...]:
+    """The stdlib and site-packages directories of this interpreter (and of its base installation, in a venv), normalized."""
+    dirs = set()
+    for vars in (None, {'base': sys.base_prefix, 'platbase': sys.base_exec_prefix}):
+        paths = sysconfig.get_paths(vars=vars)
+        dirs.update(paths[key] for key in ('stdlib', 'platstdlib', 'purelib', 'platlib') if paths.get(key))
+    try:
+        dirs.update(site.getsitepackages())
+    except AttributeError:
+        pass  # some virtualenvs' site module
+    dirs.add(site.getusersitepackages())
+    return tuple(sorted({_normalize(d).rstrip('/') + '/' for d in dirs if d}))
+
+
+class FrameClassifier:
+    def __init__(self, *, include: Iterable[str] = (), exclude: Iterable[str] = DEFAULT_EXCLUDE):
+        """
+        Tells library frames (stdlib, installed packages, IDE helpers) from user frames, by filename.
+        A file is library code if it's under one of `library_dirs()` or matches an `exclude` pattern,
+        unless it matches an `include` pattern. Patterns are fnmatch globs matched against the normalized absolute path
+        (with '/' separators), e.g. '/opt/python3-apps/*'.
+        Every filename is classified once and cached, so filtering a deep stack costs a dict lookup per frame.
+        ExcHandler uses the process-wide instance, `igit_debug.frames.classifier`:
+        ::
+            classifier.include('*/vendored/mylib/*')
+        """
+        self.library_dirs = library_dirs()
+        self._include: List[str] = list(include)
+        self._exclude: List[str] = list(exclude)
+        self._cache: Dict[str, bool] = dict()
+        self._lock = threading.Lock()
+
+    def include(self, *patterns: str):
+        """Treats files matching `patterns` as user code, even if they're under a library directory."""
+        with self._lock:
+            self._include.extend(patterns)
+            self._cache = dict()
+
+    def exclude(self, *patterns: str):
+        """Treats files matching `patterns` as library code."""
+        with self._lock:
+            self._exclude.extend(patterns)
+            self._cache = dict()
+
+    def is_library(self, filename: str) -> bool:
+        try:
+            return self._cache[filename]
+        except KeyError:
+            is_library = self._cache[filename] = self._classify(filename)
+            return is_library
+
+    def _classify(self, filename: str) -> bool:
+        if filename.startswith('<'):
+            # '<frozen importlib._bootstrap>' is the stdlib; '<stdin>', '<string>', '<ipython-input-...>' are the user's
+            return filename.startswith('<frozen ')
+        path = _normalize(filename)
+        if any(fnmatch.fnmatch(path, pattern) for pattern in self._include):
+            return False
+        if path.startswith(self.library_dirs):
+            return True
+        return any(fnmatch.fnmatch(path, pattern) for pattern in self._exclude)
+
+
+classifier = FrameClassifier()
@@ -0,0 +1,90 @@
+import json
+import sys
+from typing import Optional
+
+import logbook
+
+from igit_debug.background import BLOCK, QueueWorker
+
+JSON = 'json'
+KEY_VALUE = 'kv'
+
+
+class StructuredFormatter:
+    plain_messages = True  # as the output handler's formatter, Loggr doesn't color messages to begin with
+
+    def __init__(self, fmt: str = JSON):
+        """
+        A logbook formatter that outputs one JSON object (fmt='json') or one line of key=value pairs (fmt='kv') per record,
+        with time, level, module, function and message fields (plus exception, if any). Set as `handler.formatter`.
+        Messages logged by Loggr are formatted again without colors (see `igit_debug.loggr.LogMessage.plain`).
+        """
+        if fmt not in (JSON, KEY_VALUE):
+            raise ValueError(f"fmt must be {JSON!r} or {KEY_VALUE!r}, got {fmt!r}")
+        self.fmt = fmt
+
+    def __call__(self, record, handler) -> str:
+        plain = None if record.args else getattr(record.msg, 'plain', None)
+        fields = {'time':     record.time.isoformat(),
+                  'level':    record.level_name,
+                  'module':   record.module,
+                  'function': record.func_name,
+                  'message':  plain if plain is not None else str(record.message)}
+        if record.exc_info:
+            fields['exception'] = record.formatted_exception
+        if self.fmt == JSON:
+            return json.dumps(fields, ensure_ascii=False, default=str)
+        return ' '.join(f'{key}={_kv_value(val)}' for key, val in fields.items())
+
+
+def _kv_value(val) -> str:
+    val = str(val)
+    if not val or any(c in val for c in ' "=\n\\'):
+        return json.dumps(val, ensure_ascii=False)
+    return val
+
+
+class QueuedStreamHandler(QueueWorker, logbook.StreamHandler):
+    failure = 'writing {} records'
+
+    def __init__(self, stream=None, *,
+                 maxsize: int = 10_000,
+                 overflow: str = BLOCK,
+                 batch_size: int = 512,
+                 exit_timeout: Optional[float] = 5.0,
+                 **kwargs):
+        """
+        A `logbook.StreamHandler` that doesn't write on the logging thread.
+        Records are formatted by the logging thread and enqueued; a single background writer drains the queue,
+        joining up to `batch_size` waiting records into one `stream.write()` (and one flush).
+
+        :param stream: sys.stdout by default.
+        :param int maxsize: max records waiting to be written.
+        :param str overflow: what to do when the queue is full.
+         'block' (default): the logging thread waits until there's room.
+         'drop_newest' / 'drop_oldest': drop a record, counted in `self.dropped`.
+        :param float exit_timeout: at interpreter exit, wait this many seconds (None: indefinitely) for waiting records to be written.
+        :param kwargs: passed to `logbook.StreamHandler` (level, format_string, filter, bubble...).
+        """
+        logbook.StreamHandler.__init__(self, sys.stdout if stream is None else stream, **kwargs)
+        QueueWorker.__init__(self, maxsize=maxsize, overflow=overflow, batch_size=batch_size, exit_timeout=exit_timeout)
+
+    def emit(self, record):
+        self._enqueue(self.encode(self.format(record)))
+
+    def flush(self):
+        """Blocks until every emitted record was written, then flushes the stream."""
+        QueueWorker.flush(self)
+        logbook.StreamHandler.flush(self)
+
+    def close(self, timeout: Optional[float] = None):
+        """Writes waiting records (waiting at most `timeout` seconds) and stops the writer. Emitting again restarts it."""
+        QueueWorker.close(self, timeout)
+        logbook.StreamHandler.close(self)
+
+    def _process(self, batch: list):
+        """Runs on the writer thread with up to `batch_size` enqueued items."""
+        with self.lock:
+            self.ensure_stream_is_open()
+            self.write(''.join(batch))
+            logbook.StreamHandler.flush(self)
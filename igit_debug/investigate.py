@@ -1,11 +1,21 @@
+import ast
 import inspect
-from typing import Callable, List
+import linecache
+import os
+import sys
+import time
+import weakref
+from types import CodeType, FrameType
+from typing import Callable, List, Optional, Dict, Tuple
 
 import functools
-from more_termcolor import colors
 
 import igit_debug.formatting
-from . import ExcHandler
+from . import ExcHandler, styles
+from .background import loop_safe_output, reporter
+from .fingerprint import registry
+from .latency import registry as latency_registry
+from .sampling import SamplingPolicy, anomaly_note, sampled
 
 
 # * debug utils
@@ -15,55 +25,86 @@ from . import ExcHandler
 # https://github.com/KrazyKode101/python-debug-utils
 # https://github.com/alikins/python-debug-utils
 # https://pypi.org/project/python-debug/
+# max length of an argument or return value, as formatted by PrettySig, loginout, investigate etc
+PRETTY_MAX_CHARS = 300
+
+
+class SigPlan:
+    __slots__ = ('arg_names', 'arg_defaults', 'varargs', 'kwonly_names', 'kwonly_defaults', 'varkw')
+    
+    def __init__(self, fn):
+        """What PrettySig needs to know about `fn`'s signature, computed once per function (see `SigPlan.of`)."""
+        spec = inspect.getfullargspec(fn)
+        self.arg_names: List[str] = spec.args
+        if spec.defaults:
+            self.arg_defaults = dict(zip(spec.args[-len(spec.defaults):], spec.defaults))
+        else:
+            self.arg_defaults = dict()
+        self.varargs: Optional[str] = spec.varargs
+        self.kwonly_names: List[str] = spec.kwonlyargs
+        self.kwonly_defaults: dict = spec.kwonlydefaults or dict()
+        self.varkw: Optional[str] = spec.varkw
+    
+    @staticmethod
+    def of(fn) -> 'SigPlan':
+        try:
+            return _sig_plans[fn]
+        except KeyError:
+            plan = _sig_plans[fn] = SigPlan(fn)
+            return plan
+        except TypeError:
+            # not weak-referencable
+            return SigPlan(fn)
+
+
+_sig_plans: 'weakref.WeakKeyDictionary[Callable, SigPlan]' = weakref.WeakKeyDictionary()
+
+
 class PrettySig(dict):
     def __init__(self, fn, fn_arg_values, fn_kwargs, *, types=False):
         """Create a pretty str representation of the function signature, formatting the arg names, values [and types]."""
         super().__init__()
-        spec = inspect.getfullargspec(fn)
-        arg_names = spec.args
+        plan = SigPlan.of(fn)
+        arg_names = plan.arg_names
         
-        # prepare function default values
-        if spec.defaults:
-            arg_defaults = dict(zip(arg_names[-len(spec.defaults):], spec.defaults))
-        else:
-            arg_defaults = dict()
-        self.update(**fn_kwargs, **arg_defaults)
-        # format positional args with their respective passed values
+        self.update(plan.arg_defaults)
+        self.update(plan.kwonly_defaults)
+        self.update(fn_kwargs)
         if types:
-            _pretty_val = lambda _v: f'{igit_debug.formatting.pformat(_v)} {colors.dark(igit_debug.formatting.pformat(type(_v)))}'
+            _pretty_val = lambda _v: f'{igit_debug.formatting.pformat(_v, max_chars=PRETTY_MAX_CHARS)} {styles.dark(igit_debug.formatting.pformat(type(_v)))}'
         else:
-            _pretty_val = lambda _v: igit_debug.formatting.pformat(_v)
-        args_str = ''
+            _pretty_val = lambda _v: igit_debug.formatting.pformat(_v, max_chars=PRETTY_MAX_CHARS)
+        parts = []
+        # format positional args with their respective passed values
         for k, v in zip(arg_names, fn_arg_values):
             self[k] = v
-            args_str += f'{k}: {_pretty_val(v)}, '
+            parts.append(f'{k}: {_pretty_val(v)}')
         
-        if len(arg_names) < len(fn_arg_values):
-            # what's this?
-            args_str += ', ' + ', '.join(map(igit_debug.formatting.pformat, fn_arg_values[-len(arg_names):]))
+        # positional args beyond the named ones
+        if len(fn_arg_values) > len(arg_names):
+            varargs = tuple(fn_arg_values[len(arg_names):])
+            if plan.varargs:
+                self[plan.varargs] = varargs
+                parts.append(f'*{plan.varargs}: {", ".join(map(_pretty_val, varargs))}')
+            else:
+                parts.extend(map(_pretty_val, varargs))
         
         # we're left with:
-        # (1) positional args (with default values), that were omitted by the caller
-        # (2) keyworded args that were passed by the caller
-        # (3) keyworded args (with default values), that were omitted by the caller
+        # (1) positional or keyword-only args, passed as keywords by the caller
+        # (2) positional or keyword-only args (with default values), that were omitted by the caller
+        # (3) **kwargs that were passed by the caller
+        remaining_kwargs = dict(fn_kwargs)
+        for a in (*arg_names[len(fn_arg_values):], *plan.kwonly_names):
+            if a in remaining_kwargs:
+                parts.append(f'{a}={_pretty_val(remaining_kwargs.pop(a))}')
+            elif a in plan.arg_defaults:
+                parts.append(f'{a}={_pretty_val(plan.arg_defaults[a])}')
+            elif a in plan.kwonly_defaults:
+                parts.append(f'{a}={_pretty_val(plan.kwonly_defaults[a])}')
         
-        remaining_arg_names = arg_names[len(fn_arg_values):]
-        fn_kwargs_copy = dict(fn_kwargs)
-        self.update(**fn_kwargs)
-        # handle (1) and (2)
-        for a in remaining_arg_names:
-            # TODO: types
-            if a in fn_kwargs_copy:
-                args_str += f', {a}={igit_debug.formatting.pformat(fn_kwargs_copy[a])}'
-                del fn_kwargs_copy[a]
-            elif a in arg_defaults:
-                args_str += f', {a}={igit_debug.formatting.pformat(arg_defaults[a])}'
-        
-        # handle (3)
-        if fn_kwargs_copy:
-            for k, v in fn_kwargs_copy.items():
-                args_str += f', {k}={igit_debug.formatting.pformat(v)}'
-        self.pretty_repr = args_str
+        for k, v in remaining_kwargs.items():
+            parts.append(f'{k}={_pretty_val(v)}')
+        self.pretty_repr = ', '.join(parts)
     
     def __getattribute__(self, item):
         try:
@@ -78,105 +119,408 @@ class PrettySig(dict):
 
 
 def _pretty_retval(retval, *, types=False):
-    pretty = igit_debug.formatting.pformat(retval)
-    if len(pretty) > 300:  # don't clutter
-        pretty = f'{pretty[:300]}...'
-    elif types:
-        pretty += colors.dark(f' {igit_debug.formatting.pformat(type(retval))}')
+    pretty = igit_debug.formatting.pformat(retval, max_chars=PRETTY_MAX_CHARS)  # don't clutter
+    if types:
+        pretty += styles.dark(f' {igit_debug.formatting.pformat(type(retval))}')
     return pretty
 
 
-def logreturn(fn):
-    identifier = fn.__qualname__
+class YieldClock:
+    __slots__ = ('kind', 'items', 'logged', 'gap', 'max_gap', 'start', 'last')
+    
+    def __init__(self, kind: str):
+        """Counts the items of a traced (async) generator, and the time between its yields (in seconds).
+        Keeps no items."""
+        self.kind = kind
+        self.items = 0
+        self.logged = 0  # by the `item` hook, for its cap
+        self.gap = 0.0
+        self.max_gap = 0.0
+        self.start = self.last = time.perf_counter()
+    
+    def tick(self):
+        now = time.perf_counter()
+        self.items += 1
+        self.gap = now - self.last
+        if self.gap > self.max_gap:
+            self.max_gap = self.gap
+        self.last = now
+    
+    def summary(self, closed: bool) -> 'GeneratorSummary':
+        return GeneratorSummary(self.kind, self.items, time.perf_counter() - self.start, self.max_gap, closed)
+
+
+class GeneratorSummary:
+    __slots__ = ('kind', 'items', 'elapsed', 'max_gap', 'closed')
+    
+    def __init__(self, kind: str, items: int, elapsed: float, max_gap: float, closed: bool):
+        """What a traced (async) generator "returns": how many items it yielded, in how long, the longest time between
+        two yields, and whether it was exhausted or closed early by its consumer."""
+        self.kind = kind
+        self.items = items
+        self.elapsed = elapsed
+        self.max_gap = max_gap
+        self.closed = closed
+    
+    def __repr__(self):
+        how = 'closed' if self.closed else 'exhausted'
+        return f'<{self.kind} {how} after {self.items} items, {self.elapsed * 1000:.1f}ms, max gap {self.max_gap * 1000:.1f}ms>'
+
+
+# the hooks of a tracing decorator's wrapper (see `_wrap`). `output` writes a line (see `igit_debug.background.loop_safe_output`)
+EnterHook = Callable[[tuple, dict, Callable[[str], None]], object]  # (fn_args, fn_kwargs, output) → context
+LeaveHook = Callable[[object, object, Callable[[str], None]], None]  # (context, retval, output)
+FailHook = Callable[[object, Exception, Callable[[str], None]], None]  # (context, exception, output)
+ItemHook = Callable[[object, YieldClock, object, Callable[[str], None]], None]  # (context, clock, item, output)
+
+
+def _wrap(fn, enter: Optional[EnterHook], leave: LeaveHook, fail: FailHook = None, item: ItemHook = None, *,
+          reraise=True) -> Callable:
+    """
+    Builds the wrapper of a tracing decorator from its hooks: `enter` before the call, then `leave` with the return value
+    or `fail` with the raised exception. Coroutine functions get an async wrapper that awaits the result.
+    Generator and async generator functions get a generator wrapper that passes the items (and send() / throw())
+    through as they are consumed, calls `item` with each of them, and `leave`s with a `GeneratorSummary`.
+    Output goes through `loop_safe_output()`, so it never blocks an event loop.
+    :param bool reraise: False to swallow `fn`'s exceptions (the wrapper returns None).
+    """
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def coroutine_wrapper(*fn_args, **fn_kwargs):
+            output = loop_safe_output()
+            context = enter(fn_args, fn_kwargs, output) if enter else None
+            try:
+                retval = await fn(*fn_args, **fn_kwargs)
+            except Exception as e:
+                if fail is not None:
+                    fail(context, e, output)
+                if reraise:
+                    raise
+                return None
+            leave(context, retval, output)
+            return retval
+        
+        return coroutine_wrapper
+    
+    if inspect.isasyncgenfunction(fn):
+        @functools.wraps(fn)
+        async def async_generator_wrapper(*fn_args, **fn_kwargs):
+            output = loop_safe_output()
+            context = enter(fn_args, fn_kwargs, output) if enter else None
+            agen = fn(*fn_args, **fn_kwargs)
+            clock = YieldClock('async generator')
+            try:
+                try:
+                    value = await agen.__anext__()
+                    while True:
+                        clock.tick()
+                        if item is not None:
+                            item(context, clock, value, output)
+                        try:
+                            sent = yield value
+                        except GeneratorExit:
+                            raise
+                        except BaseException as thrown:
+                            value = await agen.athrow(thrown)
+                        else:
+                            value = await agen.asend(sent)
+                except StopAsyncIteration:
+                    leave(context, clock.summary(False), output)
+            except GeneratorExit:
+                await agen.aclose()
+                leave(context, clock.summary(True), output)
+                raise
+            except Exception as e:
+                if fail is not None:
+                    fail(context, e, output)
+                if reraise:
+                    raise
+        
+        return async_generator_wrapper
+    
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def generator_wrapper(*fn_args, **fn_kwargs):
+            output = loop_safe_output()
+            context = enter(fn_args, fn_kwargs, output) if enter else None
+            gen = fn(*fn_args, **fn_kwargs)
+            clock = YieldClock('generator')
+            try:
+                try:
+                    value = next(gen)
+                    while True:
+                        clock.tick()
+                        if item is not None:
+                            item(context, clock, value, output)
+                        try:
+                            sent = yield value
+                        except GeneratorExit:
+                            raise
+                        except BaseException as thrown:
+                            value = gen.throw(thrown)
+                        else:
+                            value = gen.send(sent)
+                except StopIteration as stop:
+                    leave(context, clock.summary(False), output)
+                    return stop.value
+            except GeneratorExit:
+                gen.close()
+                leave(context, clock.summary(True), output)
+                raise
+            except Exception as e:
+                if fail is not None:
+                    fail(context, e, output)
+                if reraise:
+                    raise
+        
+        return generator_wrapper
+    
+    if fail is None and reraise:
+        @functools.wraps(fn)
+        def wrapper(*fn_args, **fn_kwargs):
+            output = loop_safe_output()
+            context = enter(fn_args, fn_kwargs, output) if enter else None
+            retval = fn(*fn_args, **fn_kwargs)
+            leave(context, retval, output)
+            return retval
+        
+        return wrapper
     
     @functools.wraps(fn)
-    def decorator(*fn_args, **fn_kwargs):
-        retval = fn(*fn_args, **fn_kwargs)
-        pretty = _pretty_retval(retval, types=True)
-        print(f'{identifier}() returning → {pretty}')
+    def catching_wrapper(*fn_args, **fn_kwargs):
+        output = loop_safe_output()
+        context = enter(fn_args, fn_kwargs, output) if enter else None
+        try:
+            retval = fn(*fn_args, **fn_kwargs)
+        except Exception as e:
+            if fail is not None:
+                fail(context, e, output)
+            if reraise:
+                raise
+            return None
+        leave(context, retval, output)
         return retval
     
-    return decorator
+    return catching_wrapper
 
 
-# TODO: make all of these Loggr methods
-def loginout(_fn=None, *, types=False):
+def logreturn(_fn=None, *, sample: SamplingPolicy = None):
+    """
+    @logreturn
+    @logreturn(sample=EveryNth(100))
+    Works with plain functions, coroutine functions and (async) generator functions.
+    See `igit_debug.sampling` for sampling policies.
+    """
+    
     def wrapper(fn):
         identifier = fn.__qualname__
         
-        @functools.wraps(fn)
-        def decorator(*fn_args, **fn_kwargs):
-            prettysig = PrettySig(fn, fn_args, fn_kwargs)
-            sig_repr = repr(prettysig)
-            if not sig_repr:
-                sig_repr = '<no args>'
-            retval = fn(*fn_args, **fn_kwargs)
-            pretty = _pretty_retval(retval, types=types)
-            print(f'{identifier}({sig_repr}) → {pretty}')
-            return retval
+        def leave(_, retval, output):
+            pretty = _pretty_retval(retval, types=True)
+            output(f'{identifier}() returning → {pretty}')
+        
+        def report(fn_args, fn_kwargs, retval, exc, elapsed):
+            returning = '' if exc is not None else f'returning → {_pretty_retval(retval, types=True)} '
+            loop_safe_output()(f'{identifier}() {returning}{anomaly_note(exc, elapsed)}')
         
-        return decorator
+        return sampled(fn, sample, _wrap(fn, None, leave), report)
     
     if _fn is None:
         return wrapper
     return wrapper(_fn)
 
 
-def logonreturn(*variables, types=False):
-    """@logonreturn('self.answer', types=True)"""
+def _sig_repr(fn, fn_args, fn_kwargs, *, no_args='<no args>') -> str:
+    return repr(PrettySig(fn, fn_args, fn_kwargs)) or no_args
+
+
+# max number of items of a generator that `loginout(yields=...)` / `investigate(yields=...)` logs, by default
+MAX_YIELDS = 20
+
+
+def _item_logger(fn, identifier: str, yields, max_yields: int, *, types=False) -> Optional[ItemHook]:
+    """
+    The `item` hook that logs the items of a generator as they are consumed, with the time since the previous one.
+    :param yields: False (don't log items), True (log every item) or a `SamplingPolicy` (log some of the items;
+     bound once, so e.g. EveryNth counts the items of all the generators `fn` returns).
+    :param int max_yields: log at most this many items of each generator.
+    """
+    if not yields:
+        return None
+    policy = yields.bind(fn) if isinstance(yields, SamplingPolicy) else None
+    
+    def item(_, clock: YieldClock, value, output):
+        if clock.logged > max_yields:
+            return
+        if policy is not None and not policy.decide():
+            return
+        clock.logged += 1
+        if clock.logged > max_yields:
+            output(f'{identifier}() yielded more than {max_yields} items, not logging more of them')
+            return
+        output(f'{identifier}() yielded #{clock.items} → {_pretty_retval(value, types=types)} (+{clock.gap * 1000:.1f}ms)')
+    
+    return item
+
+
+# TODO: make all of these Loggr methods
+def loginout(_fn=None, *, types=False, sample: SamplingPolicy = None, yields=False, max_yields: int = MAX_YIELDS):
+    """
+    @loginout
+    @loginout(types=True, sample=TokenBucket(rate=5))
+    @loginout(yields=EveryNth(1000), max_yields=10)
+    Works with plain functions, coroutine functions and (async) generator functions.
+    Generators are traced lazily as they are consumed: the item count and time between yields are logged when they're
+    exhausted or closed, and `yields` logs the items themselves (see `_item_logger`). No item is kept.
+    See `igit_debug.sampling` for sampling policies.
+    """
     
     def wrapper(fn):
         identifier = fn.__qualname__
         
-        @functools.wraps(fn)
-        def decorator(*fn_args, **fn_kwargs):
-            retval = fn(*fn_args, **fn_kwargs)
+        def enter(fn_args, fn_kwargs, _):
+            return _sig_repr(fn, fn_args, fn_kwargs)
+        
+        def leave(sig_repr, retval, output):
+            pretty = _pretty_retval(retval, types=types)
+            output(f'{identifier}({sig_repr}) → {pretty}')
+        
+        def report(fn_args, fn_kwargs, retval, exc, elapsed):
+            sig_repr = _sig_repr(fn, fn_args, fn_kwargs)
+            returned = '' if exc is not None else f'→ {_pretty_retval(retval, types=types)} '
+            loop_safe_output()(f'{identifier}({sig_repr}) {returned}{anomaly_note(exc, elapsed)}')
+        
+        item = _item_logger(fn, identifier, yields, max_yields, types=types)
+        return sampled(fn, sample, _wrap(fn, enter, leave, item=item), report)
+    
+    if _fn is None:
+        return wrapper
+    return wrapper(_fn)
+
+
+def _print_variables(fn, fn_args, fn_kwargs, variables, *, types=False, output: Callable[[str], None] = print):
+    prettysig = PrettySig(fn, fn_args, fn_kwargs, types=types)
+    obj = prettysig
+    for var in variables:
+        attrs = var.split('.')
+        for attr in attrs:
+            obj = obj.__getattribute__(attr)
+    output(f'{var}: {igit_debug.formatting.pformat(obj, types=types)}')
+
+
+def _remember_args(fn_args, fn_kwargs, _):
+    return fn_args, fn_kwargs
+
+
+def logonreturn(*variables, types=False, sample: SamplingPolicy = None):
+    """@logonreturn('self.answer', types=True)
+    @logonreturn('self.answer', sample=Probability(0.01))
+    See `igit_debug.sampling` for sampling policies."""
+    
+    def wrapper(fn):
+        def leave(fn_args_kwargs, _, output):
             # if not variables:
-            #     print(colors.brightyellow(f'logonreturn({identifier}) no variables. returning retval as-is'))
+            #     print(styles.brightyellow(f'logonreturn({identifier}) no variables. returning retval as-is'))
             #     return retval
-            prettysig = PrettySig(fn, fn_args, fn_kwargs, types=types)
-            obj = prettysig
-            for var in variables:
-                attrs = var.split('.')
-                for attr in attrs:
-                    obj = obj.__getattribute__(attr)
-            print(f'{var}: {igit_debug.formatting.pformat(obj, types=types)}')
-            return retval
+            _print_variables(fn, *fn_args_kwargs, variables, types=types, output=output)
         
-        return decorator
+        def report(fn_args, fn_kwargs, retval, exc, elapsed):
+            output = loop_safe_output()
+            _print_variables(fn, fn_args, fn_kwargs, variables, types=types,
+                             output=lambda line: output(f'{line} {anomaly_note(exc, elapsed)}'))
+        
+        return sampled(fn, sample, _wrap(fn, _remember_args, leave), report)
     
     return wrapper
 
 
+# (code object, instruction offset) → positional argument expressions of the call at that offset
+_callsite_argnames: Dict[Tuple[CodeType, int], Optional[List[str]]] = dict()
+# (filename, modification time) → (source, tree). Trees are large, so only the most recently parsed files are kept
+_parsed_sources: Dict[Tuple[str, Optional[float]], Optional[Tuple[str, ast.Module]]] = dict()
+MAX_CALLSITES = 4096
+MAX_PARSED_SOURCES = 32
+
+
+def _bounded_put(cache: dict, key, value, max_size: int):
+    """Adds `key` to `cache`, first evicting the oldest key if `cache` is full."""
+    if len(cache) >= max_size:
+        try:
+            del cache[next(iter(cache))]
+        except (KeyError, RuntimeError, StopIteration):
+            pass  # another thread evicted it
+    cache[key] = value
+
+
+def _parse_source(filename: str) -> Optional[Tuple[str, ast.Module]]:
+    try:
+        mtime = os.stat(filename).st_mtime
+    except (OSError, ValueError):
+        mtime = None  # e.g. '<stdin>', or a module in a zip
+    key = (filename, mtime)
+    try:
+        return _parsed_sources[key]
+    except KeyError:
+        pass
+    linecache.checkcache(filename)  # the file may have changed since linecache read it
+    source = ''.join(linecache.getlines(filename))
+    try:
+        parsed = (source, ast.parse(source)) if source else None
+    except SyntaxError:
+        parsed = None
+    _bounded_put(_parsed_sources, key, parsed, MAX_PARSED_SOURCES)
+    return parsed
+
+
+def _find_call(tree: ast.Module, code: CodeType, lasti: int, lineno: int, nargs: int) -> Optional[ast.Call]:
+    calls = [node for node in ast.walk(tree) if isinstance(node, ast.Call)]
+    if hasattr(code, 'co_positions'):
+        # python 3.11+: exact span of the call expression being executed
+        try:
+            position = list(code.co_positions())[lasti // 2]
+        except IndexError:
+            position = None
+        if position and position[0] is not None:
+            for node in calls:
+                if (node.lineno, node.end_lineno, node.col_offset, node.end_col_offset) == position:
+                    return node
+    # outermost call spanning the current line, with as many positional args as passed
+    for node in calls:
+        if node.lineno <= lineno <= node.end_lineno and len(node.args) == nargs:
+            return node
+    return None
+
+
+def callsite_argnames(frame: FrameType, nargs: int) -> Optional[List[str]]:
+    """Returns the source expressions of the positional arguments passed in the call `frame` is currently executing,
+    e.g. ['a', 'b.c', 'sum([1, 2])'] for 'logger.debug(a, b.c, sum([1, 2]), varnames=True)'.
+    Multi-line and nested calls are supported. Cached per call site (code object and instruction offset),
+    for the last MAX_CALLSITES call sites.
+    Returns None if the source isn't available."""
+    code = frame.f_code
+    key = (code, frame.f_lasti)
+    try:
+        return _callsite_argnames[key]
+    except KeyError:
+        pass
+    argnames = None
+    parsed = _parse_source(code.co_filename)
+    if parsed:
+        source, tree = parsed
+        call = _find_call(tree, code, frame.f_lasti, frame.f_lineno, nargs)
+        if call:
+            argnames = [' '.join((ast.get_source_segment(source, arg) or '?').split()) for arg in call.args]
+    _bounded_put(_callsite_argnames, key, argnames, MAX_CALLSITES)
+    return argnames
+
+
 def getvarnames(*vars) -> dict:
     varnames = dict()
-    currframe = inspect.currentframe()
-    outer = inspect.getouterframes(currframe)
-    frameinfo = outer[2]  # self check: ctx has 'varnames=True'
+    frame = sys._getframe(2)  # self check: ctx has 'varnames=True'
+    argnames = callsite_argnames(frame, len(vars)) or []
     
-    ctx = frameinfo.code_context[0].strip()
-    open_parens = 0
-    last_close_i = None
-    for i, c in enumerate(reversed(ctx), 1):
-        if c == ')':
-            last_close_i = i
-            open_parens -= 1
-        elif c == '(':
-            open_parens += 1
-            if open_parens == 0:
-                fn_args_str = ctx[-i + 1:-last_close_i].replace(' ', '')
-                argnames = fn_args_str.split(',')
-                for arg in argnames[:]:
-                    if arg.startswith('types=') or arg.startswith('varnames='):
-                        argnames.remove(arg)
-                break
-    else:
-        # no argnames!
-        breakpoint()
-    
-    # argnames = ctx[ctx.find('(') + 1:-1].split(', ')
     if len(argnames) != len(vars):
-        print(f"Too complex statement, try breaking it down to variables or eliminating whitespace",
+        print(f"Too complex statement, try breaking it down to variables",
               # f'len(argnames): {len(argnames)}', f'len(args): {len(args)}', f'len(kwargs): {len(kwargs)}',
               # vprint(ctx, argnames, args, kwargs)
               )
@@ -184,7 +528,7 @@ def getvarnames(*vars) -> dict:
     
     for i, val in enumerate(vars):
         try:
-            name = argnames[i].strip()
+            name = argnames[i]
         except IndexError:
             continue  # TODO: break?
         varnames[name] = val
@@ -211,13 +555,9 @@ def vprint(*args, apply=print, **kwargs):
     
     strings = []
     if args:
-        currframe = inspect.currentframe()
-        outer = inspect.getouterframes(currframe)
-        frameinfo = outer[1]
-        ctx = frameinfo.code_context[0].strip()
-        argnames = ctx[ctx.find('(') + 1:-1].split(', ')
-        if len(argnames) != len(args) + len(kwargs):
-            print(f"Too complex statement, try breaking it down to variables or eliminating whitespace",
+        argnames = callsite_argnames(sys._getframe(1), len(args)) or []
+        if len(argnames) != len(args):
+            print(f"Too complex statement, try breaking it down to variables",
                   # f'len(argnames): {len(argnames)}', f'len(args): {len(args)}', f'len(kwargs): {len(kwargs)}',
                   # vprint(ctx, argnames, args, kwargs)
                   )
@@ -225,7 +565,7 @@ def vprint(*args, apply=print, **kwargs):
         
         for i, val in enumerate(args):
             try:
-                name = argnames[i].strip()
+                name = argnames[i]
             except IndexError:
                 continue  # TODO: break?
             strings.append(printarg(name, val))
@@ -241,64 +581,136 @@ def investigate(*,
                 locals_on_return=False,
                 formatter: Callable = igit_debug.formatting.pformat,
                 raise_on_exc=True,
-                types=False):
+                types=False,
+                background=False,
+                sample: SamplingPolicy = None,
+                yields=False,
+                max_yields: int = MAX_YIELDS,
+                latency=False):
     """
     A decorator that logs common debugging information, like formatted exceptions before they're thrown, argument names and values, return value etc.
+    Exceptions go through `igit_debug.fingerprint.registry`, so repeated identical exceptions are only counted, not printed.
+    Specify background=True to render and print exceptions on a background thread (see `igit_debug.background.reporter`).
+    Specify a `sample` policy to trace only some of the calls (see `igit_debug.sampling`).
+    Coroutine functions and async generator functions are awaited / iterated, and their output never blocks the event loop.
+    Generators are traced as they are consumed; specify `yields` to log their items (see `loginout`).
+    Specify latency=True to count calls and exceptions and record their durations in a fixed-memory histogram
+    (see `igit_debug.latency.registry`). With all other output disabled, that's a lightweight profiler.
+    The wrapper is specialized for the given options when the function is decorated; if args, ret_val, print_exc,
+    yields and latency are all False (and raise_on_exc is True), the function is returned as-is.
     ::
         @logger.investigate(locals_on_return=True)
         def foo(bar):
             ...
     """
     
+    def print_exc_report(e: Exception, *extra, output: Callable[[str], None] = print):
+        if print_exc and (occurrence := registry.record(e)):
+            note = registry.suppressed_note(occurrence)
+            if note:
+                extra = (*extra, note)
+            if background or output is not print:
+                # rendered on the reporter's thread; also, `output` may not block (see `loop_safe_output`)
+                reporter.submit(e, *extra, output=output)
+            else:
+                e_handler = ExcHandler(e)
+                print(styles.brightred(e_handler.full(*extra)))
+    
     # * similar function: https://github.com/zopefoundation/AccessControl/blob/master/src/AccessControl/requestmethod.py
     def wrapper(fn):
+        printing = args or ret_val or print_exc or yields
+        if not (printing or latency):
+            if raise_on_exc:
+                return fn
+            return _wrap(fn, None, _ignore, reraise=False)
         
-        def decorator(*fn_args, **fn_kwargs):
-            fnname = fn.__qualname__
-            if '.' in fnname:
-                identifier = fnname
-            else:
-                identifier = f'{inspect.getmodulename(inspect.getmodule(fn).__file__)}.{fnname}'
+        identifier = _identifier(fn)
+        entered_line = f'entered {identifier}()'
+        exiting_line = f'exiting {identifier}()'
+        
+        if not printing:
+            print_entered = print_returned = _ignore
+        else:
             if args:
                 # create a pretty str representation of the function arguments
-                prettysig = PrettySig(fn, fn_args, fn_kwargs)
-                sig_repr = repr(prettysig)
-                if not sig_repr:
-                    sig_repr = 'no args'
-                print(f'entered {identifier}({sig_repr})')
+                def print_entered(fn_args, fn_kwargs, output):
+                    output(f'entered {identifier}({_sig_repr(fn, fn_args, fn_kwargs, no_args="no args")})')
             else:
-                print(f'entered {identifier}()')
-            try:
-                retval = fn(*fn_args, **fn_kwargs)
-                if ret_val:
-                    
-                    if locals_on_return:
-                        # try:
-                        #     raise Exception("dummy")
-                        # except Exception as e:
-                        #     hdlr = ExcHandler(e)
-                        # ins_stack = inspect.stack()
-                        # tb_stack: traceback.StackSummary = traceback.extract_stack()
-                        # tb_stack = ExcHandler._remove_nonlib_frames(tb_stack)
-                        pass
-                    pretty = _pretty_retval(retval, types=types)
-                    print(f'{identifier}() returning → {pretty}')
-                
-                else:
-                    print(f'exiting {identifier}()')
-                
-                return retval
-            except Exception as e:
-                if print_exc:
-                    e_handler = ExcHandler(e)
-                    print(colors.brightred(e_handler.full()))
-                if raise_on_exc:
-                    raise e
+                def print_entered(fn_args, fn_kwargs, output):
+                    output(entered_line)
+            
+            # TODO: locals_on_return
+            if ret_val:
+                def print_returned(_, retval, output, note=''):
+                    output(f'{identifier}() returning → {_pretty_retval(retval, types=types)}{note}')
+            else:
+                def print_returned(_, retval, output, note=''):
+                    output(exiting_line + note)
+        
+        def print_failed(_, e, output):
+            print_exc_report(e, output=output)
         
-        return decorator
+        if latency:
+            stats = latency_registry.get(identifier)
+            
+            # the context is when the call started
+            def start_timer(*_):
+                return time.perf_counter_ns()
+            
+            def stop_timer(start, *_):
+                stats.record(time.perf_counter_ns() - start)
+            
+            def stop_timer_failed(start, *_):
+                stats.record(time.perf_counter_ns() - start, failed=True)
+            
+            def enter(fn_args, fn_kwargs, output):
+                print_entered(fn_args, fn_kwargs, output)
+                return start_timer()
+            
+            def leave(start, retval, output):
+                stop_timer(start)
+                print_returned(start, retval, output)
+            
+            def fail(start, e, output):
+                stop_timer_failed(start)
+                print_failed(start, e, output)
+            
+            # calls that aren't sampled (or are deferred) are timed too
+            untraced = _wrap(fn, start_timer, stop_timer, stop_timer_failed)
+        else:
+            enter, leave, fail = print_entered, print_returned, print_failed
+            untraced = None
+        
+        def report(fn_args, fn_kwargs, retval, exc, elapsed):
+            output = loop_safe_output()
+            print_entered(fn_args, fn_kwargs, output)
+            note = anomaly_note(exc, elapsed)
+            if exc is not None:
+                print_exc_report(exc, note, output=output)
+            else:
+                print_returned(None, retval, output, f' {note}')
+        
+        item = _item_logger(fn, identifier, yields, max_yields, types=types)
+        traced = _wrap(fn, enter, leave, fail if print_exc or latency else None, item, reraise=raise_on_exc)
+        return sampled(fn, sample, traced, report, untraced=untraced, reraise=raise_on_exc)
     
     return wrapper
 
 
+def _ignore(*_):
+    pass
+
+
+def _identifier(fn) -> str:
+    """'Class.method' for methods, 'module.function' for module-level functions."""
+    fnname = fn.__qualname__
+    if '.' in fnname:
+        return fnname
+    module = inspect.getmodule(fn)
+    module_file = getattr(module, '__file__', None)
+    modulename = module_file and inspect.getmodulename(module_file)  # None for e.g. '<stdin>'
+    return f'{modulename or fn.__module__}.{fnname}'
+
+
 def caller():
     frame = inspect.currentframe()
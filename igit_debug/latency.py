@@ -0,0 +1,165 @@
+import json
+import threading
+from typing import Dict, List, Optional
+
+# log-linear buckets, like HdrHistogram: every power of 2 is split into 2**SUB_BUCKET_BITS buckets, so a recorded value
+# is off by at most 1/2**SUB_BUCKET_BITS (12.5%). Values are in nanoseconds, up to 2**MAX_VALUE_BITS (~18 minutes).
+SUB_BUCKET_BITS = 3
+MAX_VALUE_BITS = 40
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_LINEAR_LIMIT = 1 << (SUB_BUCKET_BITS + 1)  # values below this get a bucket of their own
+_MAX_VALUE = (1 << MAX_VALUE_BITS) - 1
+BUCKETS = (MAX_VALUE_BITS - SUB_BUCKET_BITS + 1) * _SUB_BUCKETS
+
+
+def bucket_index(ns: int) -> int:
+    if ns < _LINEAR_LIMIT:
+        return ns if ns > 0 else 0
+    if ns > _MAX_VALUE:
+        ns = _MAX_VALUE
+    shift = ns.bit_length() - SUB_BUCKET_BITS - 1
+    return shift * _SUB_BUCKETS + (ns >> shift)
+
+
+def bucket_lower_bound(index: int) -> int:
+    if index < _LINEAR_LIMIT:
+        return index
+    shift = index // _SUB_BUCKETS - 1
+    return (index - shift * _SUB_BUCKETS) << shift
+
+
+class LatencyHistogram:
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        """Durations in nanoseconds, counted in a fixed number (BUCKETS) of log-linear buckets. Not thread safe by itself."""
+        self.counts: List[int] = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def record(self, ns: int):
+        self.counts[bucket_index(ns)] += 1
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if self.max is None or ns > self.max:
+            self.max = ns
+
+    def percentile(self, p: float) -> Optional[int]:
+        """The (lower bound of the bucket of the) `p`th percentile (0-100), in nanoseconds. None if nothing was recorded."""
+        if not self.count:
+            return None
+        rank = max(1, round(self.count * p / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(max(bucket_lower_bound(index), self.min), self.max)
+        return self.max
+
+    def reset(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+
+class FunctionLatency:
+    __slots__ = ('name', 'calls', 'exceptions', 'histogram', '_lock')
+
+    def __init__(self, name: str):
+        """Call count, exception count and latency histogram of one function."""
+        self.name = name
+        self.calls = 0
+        self.exceptions = 0
+        self.histogram = LatencyHistogram()
+        self._lock = threading.Lock()
+
+    def record(self, ns: int, *, failed=False):
+        with self._lock:
+            self.calls += 1
+            if failed:
+                self.exceptions += 1
+            self.histogram.record(ns)
+
+    def snapshot(self) -> dict:
+        """Times are in milliseconds."""
+        with self._lock:
+            histogram = self.histogram
+            ms = lambda ns: None if ns is None else round(ns / 1_000_000, 4)
+            return {'calls':      self.calls,
+                    'exceptions': self.exceptions,
+                    'min':        ms(histogram.min),
+                    'mean':       ms(histogram.total / histogram.count) if histogram.count else None,
+                    'p50':        ms(histogram.percentile(50)),
+                    'p90':        ms(histogram.percentile(90)),
+                    'p99':        ms(histogram.percentile(99)),
+                    'max':        ms(histogram.max)}
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.exceptions = 0
+            self.histogram.reset()
+
+
+class LatencyRegistry:
+    def __init__(self):
+        """
+        The `FunctionLatency` of every function decorated with `investigate(latency=True)`, by identifier.
+        A process-wide instance is available as `igit_debug.latency.registry`.
+        ::
+            @investigate(args=False, ret_val=False, print_exc=False, latency=True)
+            def handle(request):
+                ...
+
+            print(registry.table())
+        """
+        self._functions: Dict[str, FunctionLatency] = dict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> FunctionLatency:
+        """The `FunctionLatency` of `name`, created if needed."""
+        function = self._functions.get(name)
+        if function is None:
+            with self._lock:
+                function = self._functions.setdefault(name, FunctionLatency(name))
+        return function
+
+    def snapshot(self) -> Dict[str, dict]:
+        """{name: {'calls', 'exceptions', 'min', 'mean', 'p50', 'p90', 'p99', 'max'}}, times in milliseconds."""
+        with self._lock:
+            functions = list(self._functions.values())
+        return {function.name: function.snapshot() for function in functions}
+
+    def reset(self, name: str = None):
+        """Zeroes the counters of `name`, or of every function."""
+        with self._lock:
+            functions = list(self._functions.values()) if name is None else [self._functions.get(name)]
+        for function in functions:
+            if function is not None:
+                function.reset()
+
+    def json(self, **kwargs) -> str:
+        """`snapshot()` as JSON. `kwargs` are passed to `json.dumps` (e.g. indent)."""
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def table(self) -> str:
+        """`snapshot()` as a text table, slowest p99 first."""
+        snapshot = self.snapshot()
+        columns = ('calls', 'exceptions', 'min', 'mean', 'p50', 'p90', 'p99', 'max')
+        rows = [('function', *columns)]
+        fmt = lambda val: '-' if val is None else str(val) if isinstance(val, int) else f'{val:.4g}'
+        for name, stats in sorted(snapshot.items(), key=lambda item: item[1]['p99'] or 0, reverse=True):
+            rows.append((name, *(fmt(stats[column]) for column in columns)))
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = [f'{row[0]:<{widths[0]}}  ' + '  '.join(f'{cell:>{width}}' for cell, width in zip(row[1:], widths[1:]))
+                 for row in rows]
+        return '\n'.join(lines) + '\n(times in ms)'
+
+
+registry = LatencyRegistry()
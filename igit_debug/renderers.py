@@ -0,0 +1,245 @@
+import html
+import json
+import shutil
+import signal
+import threading
+import traceback
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+from igit_debug import styles
+
+DEFAULT_WIDTH = 80
+
+_width: Optional[int] = None
+_watching_resizes = False
+
+
+def terminal_width() -> int:
+    """The terminal's width (COLUMNS, or the size of stdout's terminal, or DEFAULT_WIDTH if it isn't one).
+    Queried once, and again after the terminal is resized (SIGWINCH, on posix, once called from the main thread)."""
+    global _width
+    if not _watching_resizes:
+        _watch_resizes()
+    if _width is None:
+        _width = shutil.get_terminal_size((DEFAULT_WIDTH, 24)).columns or DEFAULT_WIDTH
+    return _width
+
+
+def _watch_resizes():
+    global _watching_resizes
+    if not hasattr(signal, 'SIGWINCH') or threading.current_thread() is not threading.main_thread():
+        return  # signal handlers can only be set from the main thread
+    previous = signal.getsignal(signal.SIGWINCH)
+
+    def on_resize(signum, frame):
+        global _width
+        _width = None  # queried on next use, not in the handler
+        if callable(previous):
+            previous(signum, frame)
+
+    try:
+        signal.signal(signal.SIGWINCH, on_resize)
+    except ValueError:
+        return
+    _watching_resizes = True
+
+
+class Renderer:
+    def __init__(self, write: Callable[[str], Any]):
+        """
+        Receives the parts of an ExcHandler report in order, and writes them with `write` (e.g. `list.append`
+        or a file's `write`) as they come, so a report is rendered in one pass. See `ExcHandler.render()`.
+        Subclasses implement the methods below; `end()` is the last call.
+        """
+        self.write = write
+
+    def begin(self):
+        pass
+
+    def summary(self, exc_type: str, exc_args: str, last: traceback.FrameSummary, extra: Sequence):
+        """The exception and where it was raised, then any `extra` information."""
+
+    def frame(self, fs: traceback.FrameSummary, *, repeated=False):
+        """repeated=True: the same frame, at the same line, was already rendered (`fs` has no line nor locals)."""
+
+    def locals(self, lokals: Iterable[Tuple[str, str, str]], *, above=False):
+        """The (name, rendered value, rendered type) of each local of the last frame.
+        above=True: the same frame's locals were already rendered (`lokals` is empty)."""
+
+    def linked(self, label: str, level: int, exc_type: str, exc_args: str):
+        """A linked exception (see `ExcHandler.linked`); its frames follow. `level`: how many ExceptionGroups deep."""
+
+    def note(self, text: str):
+        """Additional, secondary information (e.g. omitted linked exceptions, the flight recorder's records)."""
+
+    def end(self):
+        pass
+
+
+_identity = lambda string: string
+
+
+class TextRenderer(Renderer):
+    # styles of the different parts. Identity here (plain text), colors in AnsiRenderer
+    exc_type_style = staticmethod(_identity)
+    name_style = staticmethod(_identity)
+    label_style = staticmethod(_identity)
+    local_name_style = staticmethod(_identity)
+    dim_style = staticmethod(_identity)
+
+    def __init__(self, write: Callable[[str], Any], *, width: int = None):
+        """Text, framed by lines as wide as the terminal (or `width`)."""
+        super().__init__(write)
+        self.width = width
+
+    def begin(self):
+        if self.width is None:
+            self.width = terminal_width()
+        self.write(f'\n{"-" * self.width}\n\n')
+
+    def summary(self, exc_type: str, exc_args: str, last: traceback.FrameSummary, extra: Sequence):
+        self.write('\n'.join([
+            f'{self.exc_type_style(exc_type)}, File "{last.filename}", line {last.lineno} in {self.name_style(last.name)}()',
+            self.label_style('Exception args:'),
+            f'\t{exc_args}',
+            self.label_style('Responsible code:'),
+            f'\t{last.line}',
+            *map(str, extra)
+        ]))
+
+    def frame(self, fs: traceback.FrameSummary, *, repeated=False):
+        write = self.write
+        write(f'\nFile "{fs.filename}", line {fs.lineno} in {self.name_style(fs.name + "()")}')
+        if repeated:
+            write(self.dim_style(' (same frame as above)'))
+        else:
+            write(f'\n\t{fs.line}')
+
+    def locals(self, lokals: Iterable[Tuple[str, str, str]], *, above=False):
+        write = self.write
+        if above:
+            write(f'\n{self.label_style("Locals")}: {self.dim_style("(same frame as above)")}')
+            return
+        write(f'\n{self.label_style("Locals")}:\n')
+        for name, val, typ in lokals:
+            write(self.local(name, val, typ))
+
+    def local(self, name: str, val: str, typ: str) -> str:
+        if '\n' in val:
+            return f'\t{self.local_name_style(name)}: """{val}""" {self.dim_style(typ)}\n\n'  # queries etc
+        return f'\t{self.local_name_style(name)}: {val} {self.dim_style(typ)}\n'
+
+    def linked(self, label: str, level: int, exc_type: str, exc_args: str):
+        exc = self.exc_type_style(exc_type)
+        if exc_args:
+            exc += f': {exc_args}'
+        self.write(f'\n\n{"  " * level}{self.label_style(label)}: {exc}')
+
+    def note(self, text: str):
+        self.write(f'\n\n{self.dim_style(text)}')
+
+    def end(self):
+        self.write(f'\n{"-" * self.width}\n')
+
+
+class PlainRenderer(TextRenderer):
+    """Text without colors, e.g. for files."""
+
+
+class AnsiRenderer(TextRenderer):
+    """Text with ANSI colors. What `ExcHandler.full()` returns."""
+    exc_type_style = staticmethod(styles.brightwhite)
+    name_style = staticmethod(styles.brightwhite)
+    label_style = staticmethod(styles.white)
+    local_name_style = staticmethod(styles.white)
+    dim_style = staticmethod(styles.dark)
+
+
+class HtmlRenderer(TextRenderer):
+    """A <pre class="igit-exc"> block; parts are <span>s with 'exc-type', 'name', 'label', 'local' or 'dim' classes."""
+
+    exc_type_style = staticmethod(lambda string: f'<span class="exc-type">{string}</span>')
+    name_style = staticmethod(lambda string: f'<span class="name">{string}</span>')
+    label_style = staticmethod(lambda string: f'<span class="label">{string}</span>')
+    local_name_style = staticmethod(lambda string: f'<span class="local">{string}</span>')
+    dim_style = staticmethod(lambda string: f'<span class="dim">{string}</span>')
+    _escape = staticmethod(html.escape)  # parts are escaped before they're styled
+
+    def begin(self):
+        self.write('<pre class="igit-exc">')
+
+    def summary(self, exc_type: str, exc_args: str, last: traceback.FrameSummary, extra: Sequence):
+        escape = self._escape
+        super().summary(escape(exc_type), escape(exc_args), _escaped_frame(last), [escape(str(e)) for e in extra])
+
+    def frame(self, fs: traceback.FrameSummary, *, repeated=False):
+        super().frame(_escaped_frame(fs, repeated=repeated), repeated=repeated)
+
+    def locals(self, lokals: Iterable[Tuple[str, str, str]], *, above=False):
+        escape = self._escape
+        super().locals(((escape(name), escape(val), escape(typ)) for name, val, typ in lokals), above=above)
+
+    def linked(self, label: str, level: int, exc_type: str, exc_args: str):
+        escape = self._escape
+        super().linked(escape(label), level, escape(exc_type), escape(exc_args))
+
+    def note(self, text: str):
+        super().note(self._escape(text))
+
+    def end(self):
+        self.write('\n</pre>\n')
+
+
+def _escaped_frame(fs: traceback.FrameSummary, *, repeated=False) -> traceback.FrameSummary:
+    line = None if repeated else fs.line  # a repeated frame's line isn't rendered, nor looked up
+    return traceback.FrameSummary(html.escape(fs.filename), fs.lineno, html.escape(fs.name), lookup_line=False,
+                                  line=None if line is None else html.escape(line))
+
+
+class JsonRenderer(Renderer):
+    """One JSON object: {'type', 'args', 'file', 'line', 'name', 'code', 'extra',
+    'frames': [{'file', 'line', 'name', 'code', 'repeated', 'locals': {name: {'value', 'type'}} or 'same frame as above'}],
+    'linked': [{'relation', 'level', 'type', 'args', 'frames'}], 'notes'}, written by `end()`."""
+
+    def __init__(self, write: Callable[[str], Any], **dumps_kwargs):
+        super().__init__(write)
+        self.dumps_kwargs = dumps_kwargs
+        self.report: Dict[str, Any] = dict()
+        self._frames: List[dict] = []
+
+    def summary(self, exc_type: str, exc_args: str, last: traceback.FrameSummary, extra: Sequence):
+        self.report.update({'type': exc_type, 'args': exc_args, 'file': last.filename, 'line': last.lineno,
+                            'name': last.name, 'code': last.line, 'extra': [str(e) for e in extra],
+                            'frames': self._frames, 'linked': [], 'notes': []})
+
+    def frame(self, fs: traceback.FrameSummary, *, repeated=False):
+        self._frames.append({'file': fs.filename, 'line': fs.lineno, 'name': fs.name,
+                             'code': None if repeated else fs.line, 'repeated': repeated})
+
+    def locals(self, lokals: Iterable[Tuple[str, str, str]], *, above=False):
+        self._frames[-1]['locals'] = 'same frame as above' if above else {name: {'value': val, 'type': typ}
+                                                                           for name, val, typ in lokals}
+
+    def linked(self, label: str, level: int, exc_type: str, exc_args: str):
+        self._frames = []
+        self.report['linked'].append({'relation': label, 'level': level, 'type': exc_type, 'args': exc_args,
+                                      'frames': self._frames})
+
+    def note(self, text: str):
+        self.report['notes'].append(text)
+
+    def end(self):
+        self.write(json.dumps(self.report, ensure_ascii=False, **self.dumps_kwargs))
+
+
+RENDERERS: Dict[str, Type[Renderer]] = {'ansi': AnsiRenderer, 'plain': PlainRenderer, 'html': HtmlRenderer, 'json': JsonRenderer}
+
+
+def get_renderer(renderer: Union[str, Type[Renderer]]) -> Type[Renderer]:
+    if isinstance(renderer, str):
+        try:
+            return RENDERERS[renderer]
+        except KeyError:
+            raise ValueError(f"renderer must be one of {', '.join(map(repr, RENDERERS))} or a Renderer subclass, "
+                             f"got {renderer!r}") from None
+    return renderer
@@ -0,0 +1,246 @@
+import copy
+import functools
+import inspect
+import itertools
+import random
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# what `SamplingPolicy.decide()` returns when whether a call is traced depends on how it went (see `settle()`)
+DEFER = None
+
+
+class SamplingPolicy:
+    def __init__(self):
+        """
+        Decides which calls of a decorated function are traced, for `investigate`, `loginout`, `logreturn` and `logonreturn`:
+        ::
+            @loginout(sample=EveryNth(100))
+            def handle(request):
+                ...
+
+            handle.sampling.sampled, handle.sampling.suppressed
+
+        The decorator binds a copy of the policy to the function (see `bind()`), so one policy instance can be passed
+        to several decorators, and every function has its own state and counters (also see `sampling.stats()`).
+        Calls that aren't traced don't construct a PrettySig or format anything.
+        """
+        self.name: Optional[str] = None
+        self.sampled = 0
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def bind(self, fn: Callable) -> 'SamplingPolicy':
+        """A copy of this policy with fresh state, counting the calls of `fn`."""
+        bound = copy.copy(self)
+        bound.name = f'{fn.__module__}.{fn.__qualname__}'
+        bound.sampled = 0
+        bound.suppressed = 0
+        bound._lock = threading.Lock()
+        bound._reset()
+        _bound.add(bound)
+        return bound
+
+    def decide(self) -> Optional[bool]:
+        """Called before every call: True to trace it, False not to, DEFER to decide with `settle()` after the call."""
+        decision = self._decide()
+        if decision is not DEFER:
+            self._count(decision)
+        return decision
+
+    def settle(self, exc: Optional[BaseException], elapsed: float) -> bool:
+        """Called after a DEFERred call with the exception it raised (if any) and how long it took (in seconds).
+        Returns whether to report the call."""
+        report = self._is_anomaly(exc, elapsed)
+        self._count(report)
+        return report
+
+    def _count(self, sampled: bool):
+        with self._lock:
+            if sampled:
+                self.sampled += 1
+            else:
+                self.suppressed += 1
+
+    def _reset(self):
+        pass
+
+    def _decide(self) -> Optional[bool]:
+        return True
+
+    def _is_anomaly(self, exc: Optional[BaseException], elapsed: float) -> bool:
+        return True
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.name}: sampled={self.sampled}, suppressed={self.suppressed})'
+
+
+class EveryNth(SamplingPolicy):
+    def __init__(self, n: int):
+        """Traces the 1st, n+1th, 2n+1th... calls."""
+        if n < 1:
+            raise ValueError(f"n must be at least 1, got {n!r}")
+        super().__init__()
+        self.n = n
+        self._calls = itertools.count()
+
+    def _reset(self):
+        self._calls = itertools.count()
+
+    def _decide(self) -> bool:
+        return next(self._calls) % self.n == 0
+
+
+class Probability(SamplingPolicy):
+    def __init__(self, rate: float):
+        """Traces each call with probability `rate` (0 to 1)."""
+        if not 0 <= rate <= 1:
+            raise ValueError(f"rate must be between 0 and 1, got {rate!r}")
+        super().__init__()
+        self.rate = rate
+
+    def _decide(self) -> bool:
+        return random.random() < self.rate
+
+
+class TokenBucket(SamplingPolicy):
+    def __init__(self, rate: float, burst: int = 1):
+        """Traces up to `rate` calls per second on average, and up to `burst` calls at once."""
+        if rate <= 0 or burst < 1:
+            raise ValueError(f"rate must be positive and burst at least 1, got rate={rate!r}, burst={burst!r}")
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+
+    def _reset(self):
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+
+    def _decide(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class FirstThenAnomalies(SamplingPolicy):
+    def __init__(self, n: int = 10, *, slow: float = None):
+        """
+        Traces the first `n` calls, then only calls that raise or that take at least `slow` seconds.
+        The report of such a call is made after it returns, so its arguments are shown as they are then.
+        """
+        super().__init__()
+        self.n = n
+        self.slow = slow
+        self._calls = itertools.count()
+
+    def _reset(self):
+        self._calls = itertools.count()
+
+    def _decide(self) -> Optional[bool]:
+        return True if next(self._calls) < self.n else DEFER
+
+    def _is_anomaly(self, exc: Optional[BaseException], elapsed: float) -> bool:
+        return exc is not None or (self.slow is not None and elapsed >= self.slow)
+
+
+def timed_call(fn: Callable, fn_args, fn_kwargs) -> Tuple[Any, Optional[Exception], float]:
+    """Calls `fn` and returns (return value, raised exception, elapsed seconds), for DEFERred calls."""
+    start = time.perf_counter()
+    try:
+        return fn(*fn_args, **fn_kwargs), None, time.perf_counter() - start
+    except Exception as e:
+        return None, e, time.perf_counter() - start
+
+
+async def timed_await(fn: Callable, fn_args, fn_kwargs) -> Tuple[Any, Optional[Exception], float]:
+    """`timed_call` for coroutine functions."""
+    start = time.perf_counter()
+    try:
+        return await fn(*fn_args, **fn_kwargs), None, time.perf_counter() - start
+    except Exception as e:
+        return None, e, time.perf_counter() - start
+
+
+def sampled(fn: Callable, sample: Optional[SamplingPolicy], traced: Callable,
+            report: Callable[[tuple, dict, Any, Optional[Exception], float], None], *,
+            untraced: Callable = None,
+            reraise=True) -> Callable:
+    """
+    Wraps `fn` so its calls are traced according to `sample`, for the tracing decorators. Returns `traced` as-is if `sample` is None.
+    Sampled calls go through `traced`, unsampled calls call `fn` directly, and DEFERred calls that turn out anomalous
+    are reported after the fact with `report(fn_args, fn_kwargs, retval, exc, elapsed)`.
+    Coroutine functions are awaited. DEFERred calls of (async) generator functions aren't traced.
+    The policy bound to `fn` is available as `wrapper.sampling`.
+    :param untraced: called instead of `fn` for calls that aren't traced (e.g. to time every call). Must raise `fn`'s exceptions.
+    :param bool reraise: whether untraced calls raise `fn`'s exceptions (like `traced` does).
+    """
+    if sample is None:
+        return traced
+    sampler = sample.bind(fn)
+    call = fn if untraced is None else untraced
+    
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*fn_args, **fn_kwargs):
+            decision = sampler.decide()
+            if decision is True:
+                return await traced(*fn_args, **fn_kwargs)
+            if decision is False and reraise:
+                return await call(*fn_args, **fn_kwargs)
+            retval, exc, elapsed = await timed_await(call, fn_args, fn_kwargs)
+            if decision is DEFER and sampler.settle(exc, elapsed):
+                report(fn_args, fn_kwargs, retval, exc, elapsed)
+            if exc is not None and reraise:
+                raise exc
+            return retval
+    
+    elif inspect.isgeneratorfunction(fn) or inspect.isasyncgenfunction(fn):
+        @functools.wraps(fn)
+        def wrapper(*fn_args, **fn_kwargs):
+            decision = sampler.decide()
+            if decision is True:
+                return traced(*fn_args, **fn_kwargs)
+            if decision is DEFER:
+                sampler._count(False)
+            return call(*fn_args, **fn_kwargs)
+    
+    else:
+        @functools.wraps(fn)
+        def wrapper(*fn_args, **fn_kwargs):
+            decision = sampler.decide()
+            if decision is True:
+                return traced(*fn_args, **fn_kwargs)
+            if decision is False and reraise:
+                return call(*fn_args, **fn_kwargs)
+            retval, exc, elapsed = timed_call(call, fn_args, fn_kwargs)
+            if decision is DEFER and sampler.settle(exc, elapsed):
+                report(fn_args, fn_kwargs, retval, exc, elapsed)
+            if exc is not None and reraise:
+                raise exc
+            return retval
+    
+    wrapper.sampling = sampler
+    return wrapper
+
+
+def anomaly_note(exc: Optional[BaseException], elapsed: float) -> str:
+    if exc is not None:
+        return f'(raised {exc.__class__.__qualname__} after {elapsed * 1000:.1f}ms)'
+    return f'(slow: {elapsed * 1000:.1f}ms)'
+
+
+_bound: 'weakref.WeakSet[SamplingPolicy]' = weakref.WeakSet()
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    """Counters of every function decorated with a sampling policy, e.g. {'app.handle': {'sampled': 10, 'suppressed': 990}}."""
+    return {policy.name: {'sampled': policy.sampled, 'suppressed': policy.suppressed} for policy in list(_bound)}
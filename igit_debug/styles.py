@@ -0,0 +1,95 @@
+"""
+ANSI styles, compiled once into a prefix and a suffix that are concatenated around the text:
+::
+    from igit_debug import styles
+    styles.dark('skipped')  # '\\x1b[2mskipped\\x1b[22m'
+
+Colors are on unless turned off, which makes every style return its text as-is, without any other work.
+They're off when NO_COLOR is set (https://no-color.org), when IGIT_COLOR=never, or, unless IGIT_COLOR=always or
+FORCE_COLOR is set, when stdout isn't a terminal (a pipe, a file). PyCharm's console counts as a terminal.
+Decided on import; `set_color()` decides again or overrides.
+"""
+import os
+import sys
+from typing import List, Optional, Tuple
+
+# the SGR code that resets each SGR code
+_RESETS = {1: 22, 2: 22, 3: 23, 4: 24, 5: 25, 7: 27, 9: 29,
+           **{code: 39 for code in (*range(30, 38), *range(90, 98))},
+           **{code: 49 for code in (*range(40, 48), *range(100, 108))}}
+
+enabled = True
+
+
+class Style:
+    __slots__ = ('codes', 'prefix', 'suffix', 'resets', '_on')
+
+    def __init__(self, *codes: int):
+        """Applies SGR `codes` (e.g. 33, 1 for bold yellow). Text that's already styled keeps its styles,
+        and this style resumes after each of them."""
+        self.codes = codes
+        resets = tuple(dict.fromkeys(f'\x1b[{_RESETS[code]}m' for code in codes))
+        self._on: Tuple[str, str, Tuple[str, ...]] = (f'\x1b[{";".join(map(str, codes))}m', ''.join(resets), resets)
+        self.prefix = self.suffix = ''
+        self.resets: Tuple[str, ...] = ()
+        self._apply(enabled)
+        _styles.append(self)
+
+    def _apply(self, on: bool):
+        self.prefix, self.suffix, self.resets = self._on if on else ('', '', ())
+
+    def __call__(self, text: str) -> str:
+        prefix = self.prefix
+        if not prefix:
+            return text
+        text = f'{text}'
+        if '\x1b[' in text:
+            for reset in self.resets:
+                text = text.replace(reset, reset + prefix)
+        return prefix + text + self.suffix
+
+    def __repr__(self):
+        return f'Style{self.codes}'
+
+
+_styles: List[Style] = []
+
+
+def _auto() -> bool:
+    if os.environ.get('NO_COLOR'):
+        return False
+    preference = os.environ.get('IGIT_COLOR', 'auto').lower()
+    if preference in ('never', 'off', '0'):
+        return False
+    if preference in ('always', 'on', '1') or os.environ.get('FORCE_COLOR') or os.environ.get('PYCHARM_HOSTED'):
+        return True
+    try:
+        return sys.stdout.isatty()
+    except (AttributeError, ValueError):  # replaced or closed stdout
+        return False
+
+
+def set_color(on: Optional[bool] = None) -> bool:
+    """Turns colors on or off for every style, or decides again from the environment (None). Returns whether they're on."""
+    global enabled
+    enabled = _auto() if on is None else bool(on)
+    for style in _styles:
+        style._apply(enabled)
+    return enabled
+
+
+dark = Style(2)
+bold = Style(1)
+ul = Style(4)
+red = Style(31)
+green = Style(32)
+yellow = Style(33)
+white = Style(37)
+brightblack = Style(90)
+brightred = Style(91)
+brightyellow = Style(93)
+brightwhite = Style(97)
+bold_yellow = Style(33, 1)
+bold_white = Style(37, 1)
+
+set_color()
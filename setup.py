@@ -14,8 +14,8 @@ setup(name='igit_debug',
       author='Gilad Barnea',
       author_email='giladbrn@gmail.com',
       license='MIT',
-      packages=find_packages(exclude=["tests?", "*.tests*", "*.tests*.*", "tests*.*", ]),
-      install_requires=['more_termcolor>=1.0.9', 'logbook'],
+      packages=find_packages(exclude=["tests?", "*.tests*", "*.tests*.*", "tests*.*", "benchmarks*"]),
+      install_requires=['logbook'],
       extras_require={'dev': ['pytest', 'ipdb', 'IPython', 'semver', 'twine']},
       classifiers=[
           # https://pypi.org/classifiers/